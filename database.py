@@ -3,30 +3,175 @@
 SQLite3 база для хранения оборудования и расчета амортизации
 """
 
+import atexit
+import contextlib
+import os
+import queue
 import sqlite3
-from typing import List, Dict, Any, Optional
+import sys
+import threading
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
 from datetime import datetime
 
+# Версия схемы: хранится в PRAGMA user_version, чтобы не выполнять
+# CREATE TABLE IF NOT EXISTS при каждом открытии соединения
+SCHEMA_VERSION = 1
+
+# Порядок колонок таблицы tmc — для «сырых» выборок без словарей
+COLUMNS = [
+    "id", "name", "price", "quantity", "total_cost",
+    "amortization_months", "monthly_cost", "created_at", "updated_at"
+]
+
+
+class Item(NamedTuple):
+    """Строка таблицы tmc.
+
+    Доступ по атрибуту (item.price) — это чтение слота кортежа,
+    примерно вдвое быстрее словарного item['price'], а сама строка
+    занимает меньше памяти и неизменяема, поэтому кэш может
+    выдавать её без защитных копий. Порядок полей совпадает
+    с COLUMNS и SELECT *.
+    """
+
+    id: int
+    name: str
+    price: float
+    quantity: int
+    total_cost: float
+    amortization_months: int
+    monthly_cost: float
+    created_at: str
+    updated_at: str
+
+# SQL горячих путей как константы модуля: в cursor.execute каждый раз
+# попадает один и тот же объект строки, что гарантирует попадание
+# в кэш подготовленных выражений sqlite3
+_SQL_INSERT_ITEM = """
+    INSERT INTO tmc (name, price, quantity, amortization_months)
+    VALUES (?, ?, ?, ?)
+"""
+_SQL_GET_ITEM = "SELECT * FROM tmc WHERE id = ?"
+
+# Предел кэша товаров по ID
+_ITEM_CACHE_MAX = 128
+_SQL_GET_ALL_ITEMS = "SELECT * FROM tmc ORDER BY id"
+_SQL_DELETE_ITEM = "DELETE FROM tmc WHERE id = ?"
+_SQL_TOTAL_MONTHLY = "SELECT total_monthly_cost FROM tmc_totals WHERE id = 1"
+_SQL_SUMMARY = """
+    SELECT total_items, total_quantity, total_investment, total_monthly_cost
+    FROM tmc_totals WHERE id = 1
+"""
+
 
 class TMCDatabase:
-    """Класс для работы с базой данных ТМЦ."""
-    
-    def __init__(self, db_path: str = "tmc.db"):
+    """Класс для работы с базой данных ТМЦ.
+
+    Один экземпляр можно безопасно разделять между потоками
+    (FastAPI выполняет обработчики в threadpool): записи
+    сериализуются через внутренний lock.
+
+    При readers > 0 дополнительно открывается пул read-only
+    соединений: под WAL читатели работают параллельно друг с другом
+    и с писателем, поэтому GET-запросы не выстраиваются в очередь
+    за единственным соединением.
+    """
+
+    def __init__(self, db_path: str = "tmc.db", readers: int = 0):
         """
         Инициализация базы данных.
-        
+
         Args:
             db_path: Путь к файлу базы данных
+            readers: Размер пула read-only соединений (0 — без пула)
         """
         self.db_path = db_path
         self.connection = None
+        # RLock: мутаторы могут вызываться внутри batch(), который
+        # уже держит блокировку на весь пакет
+        self._write_lock = threading.RLock()
+        self._in_batch = False
+        # Кэш товаров по ID: интерактивные сценарии часто запрашивают
+        # одну и ту же строку несколько раз подряд
+        self._item_cache: Dict[int, Item] = {}
+        # Кэши полного списка и сводки: повторные чтения без изменений
+        # данных не перечитывают таблицу
+        self._all_items_cache: Optional[List[Item]] = None
+        self._summary_cache: Optional[Dict[str, Any]] = None
+        self._monthly_cost_column: Optional[Dict[int, float]] = None
+        # Счетчик поколений кэша: растет при каждом изменении данных,
+        # чтобы чтение, начатое до изменения, не закэшировало
+        # устаревшую строку после него
+        self._cache_generation = 0
         self._connect()
-        self._create_tables()
-    
+
+        # Схема создается один раз; дальше открытие соединения
+        # не трогает sqlite_master
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            self._create_tables()
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.connection.commit()
+
+        # Пул читателей открывается после создания схемы:
+        # mode=ro требует существующего файла
+        self._readers = None
+        if readers > 0:
+            self._readers = queue.Queue(maxsize=readers)
+            for _ in range(readers):
+                conn = sqlite3.connect(
+                    f"file:{self.db_path}?mode=ro",
+                    uri=True,
+                    check_same_thread=False,
+                    cached_statements=256
+                )
+                conn.row_factory = sqlite3.Row
+                self._apply_read_pragmas(conn)
+                self._readers.put(conn)
+
+    @staticmethod
+    def _apply_read_pragmas(conn: sqlite3.Connection):
+        """Настройка кэша/временного хранилища для читающего соединения."""
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-64000")
+        cursor.execute("PRAGMA mmap_size=268435456")
+
+    @contextlib.contextmanager
+    def _read_conn(self):
+        """Выдача соединения для чтения (из пула, если он есть)."""
+        if self._readers is None:
+            yield self.connection
+        else:
+            conn = self._readers.get()
+            try:
+                yield conn
+            finally:
+                self._readers.put(conn)
+
     def _connect(self):
         """Подключение к базе данных."""
-        self.connection = sqlite3.connect(self.db_path)
+        # check_same_thread=False: соединение переиспользуется из разных
+        # потоков threadpool'а, записи защищены self._write_lock
+        self.connection = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=256
+        )
         self.connection.row_factory = sqlite3.Row  # Для доступа к колонкам по имени
+
+        # Настройка SQLite: WAL позволяет читать параллельно с записью,
+        # synchronous=NORMAL убирает fsync на каждый commit,
+        # увеличенный кэш и mmap сокращают число системных вызовов
+        cursor = self.connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # synchronous=OFF быстрее, но жертвует надежностью — только по запросу
+        if os.environ.get("TMC_DB_SYNCHRONOUS_OFF"):
+            cursor.execute("PRAGMA synchronous=OFF")
+        else:
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-64000")
+        cursor.execute("PRAGMA mmap_size=268435456")
     
     def _create_tables(self):
         """Создание таблиц в базе данных."""
@@ -46,9 +191,129 @@ class TMCDatabase:
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
-        
+
+        # Сводная таблица из одной строки, поддерживается триггерами:
+        # сводка читается за O(1) вместо SUM() по всей таблице
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS tmc_totals (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total_items INTEGER NOT NULL DEFAULT 0,
+                total_quantity INTEGER NOT NULL DEFAULT 0,
+                total_investment REAL NOT NULL DEFAULT 0,
+                total_monthly_cost REAL NOT NULL DEFAULT 0
+            )
+        """)
+        # Начальное заполнение из текущего содержимого tmc
+        # (для баз, созданных до появления tmc_totals).
+        # OR IGNORE: агрегатный SELECT выдает строку даже при ложном
+        # WHERE, поэтому повторный вызов (конкурентная инициализация,
+        # миграция схемы) не должен падать на UNIQUE по id
+        cursor.execute("""
+            INSERT OR IGNORE INTO tmc_totals (id, total_items, total_quantity, total_investment, total_monthly_cost)
+            SELECT 1,
+                   COUNT(*),
+                   COALESCE(SUM(quantity), 0),
+                   COALESCE(SUM(total_cost), 0),
+                   COALESCE(SUM(monthly_cost), 0)
+            FROM tmc
+        """)
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS tmc_totals_insert AFTER INSERT ON tmc
+            BEGIN
+                UPDATE tmc_totals SET
+                    total_items = total_items + 1,
+                    total_quantity = total_quantity + NEW.quantity,
+                    total_investment = total_investment + NEW.total_cost,
+                    total_monthly_cost = total_monthly_cost + NEW.monthly_cost;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS tmc_totals_delete AFTER DELETE ON tmc
+            BEGIN
+                UPDATE tmc_totals SET
+                    total_items = total_items - 1,
+                    total_quantity = total_quantity - OLD.quantity,
+                    total_investment = total_investment - OLD.total_cost,
+                    total_monthly_cost = total_monthly_cost - OLD.monthly_cost;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS tmc_totals_update AFTER UPDATE ON tmc
+            BEGIN
+                UPDATE tmc_totals SET
+                    total_quantity = total_quantity - OLD.quantity + NEW.quantity,
+                    total_investment = total_investment - OLD.total_cost + NEW.total_cost,
+                    total_monthly_cost = total_monthly_cost - OLD.monthly_cost + NEW.monthly_cost;
+            END
+        """)
+
         self.connection.commit()
     
+    def _commit(self):
+        """Commit изменений, если не открыта пакетная транзакция batch()."""
+        if not self._in_batch:
+            self.connection.commit()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Одна транзакция на серию изменений.
+
+        Внутри блока add_item/update_item/delete_item не делают
+        commit на каждую строку — fsync выполняется один раз при
+        выходе из блока. При исключении вся пачка откатывается.
+
+        Yields:
+            Этот же экземпляр базы
+        """
+        with self._write_lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self._in_batch = True
+            try:
+                yield self
+            except BaseException:
+                self.connection.rollback()
+                # В кэше карточек могли остаться отмененные строки
+                self._item_cache.clear()
+                self._mark_dirty()
+                raise
+            else:
+                self.connection.commit()
+            finally:
+                self._in_batch = False
+
+    def _mark_dirty(self):
+        """Сброс кэшей списка и сводки после изменения данных."""
+        self._all_items_cache = None
+        self._summary_cache = None
+        self._monthly_cost_column = None
+        self._cache_generation += 1
+
+    def _monthly_costs(self) -> Dict[int, float]:
+        """
+        Колонка monthly_cost в памяти: id -> месячная стоимость.
+
+        Перестраивается лениво после каждого изменения данных, так что
+        повторные суммирования выборок не ходят в SQLite вообще.
+
+        Returns:
+            Словарь id -> monthly_cost по всем товарам
+        """
+        column = self._monthly_cost_column
+        if column is None:
+            generation = self._cache_generation
+            with self._read_conn() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT id, monthly_cost FROM tmc")
+                column = dict(cursor.fetchall())
+            # Сохраняем только при неизменившемся поколении — иначе
+            # колонка пережила бы инвалидацию параллельной записи
+            with self._write_lock:
+                if self._cache_generation == generation:
+                    self._monthly_cost_column = column
+        return column
+
     def add_item(
         self,
         name: str,
@@ -78,46 +343,200 @@ class TMCDatabase:
         if amortization_months <= 0:
             raise ValueError("Срок амортизации должен быть больше нуля")
         
-        cursor = self.connection.cursor()
-        cursor.execute("""
-            INSERT INTO tmc (name, price, quantity, amortization_months)
-            VALUES (?, ?, ?, ?)
-        """, (name, price, quantity, amortization_months))
-        
-        self.connection.commit()
-        return cursor.lastrowid
+        with self._write_lock:
+            self._mark_dirty()
+            cursor = self.connection.cursor()
+            cursor.execute(_SQL_INSERT_ITEM, (name, price, quantity, amortization_months))
+
+            self._commit()
+            return cursor.lastrowid
     
-    def get_item(self, item_id: int) -> Optional[Dict[str, Any]]:
+    def add_items_bulk(self, rows: List[tuple]) -> int:
+        """
+        Массовое добавление товаров одной транзакцией.
+
+        Один commit на всю пачку вместо commit'а на каждую строку —
+        на порядки быстрее при импорте больших каталогов.
+
+        Args:
+            rows: Список кортежей (name, price, quantity, amortization_months)
+
+        Returns:
+            Количество добавленных товаров
+
+        Raises:
+            ValueError: Если параметры какой-либо строки некорректны
+        """
+        for name, price, quantity, amortization_months in rows:
+            if price <= 0:
+                raise ValueError("Цена должна быть больше нуля")
+            if quantity <= 0:
+                raise ValueError("Количество должно быть больше нуля")
+            if amortization_months <= 0:
+                raise ValueError("Срок амортизации должен быть больше нуля")
+
+        with self._write_lock:
+            self._mark_dirty()
+            cursor = self.connection.cursor()
+            cursor.executemany(_SQL_INSERT_ITEM, rows)
+            # Один commit на всю пачку; внутри batch() он откладывается
+            # до выхода из блока, как и у остальных мутаторов
+            self._commit()
+            return cursor.rowcount
+
+    def get_item(self, item_id: int) -> Optional[Item]:
         """
         Получение товара по ID.
-        
+
         Args:
             item_id: ID товара
-            
+
         Returns:
-            Словарь с данными товара или None
+            Строка товара (Item) или None
         """
-        cursor = self.connection.cursor()
-        cursor.execute("SELECT * FROM tmc WHERE id = ?", (item_id,))
-        row = cursor.fetchone()
-        
+        cached = self._item_cache.get(item_id)
+        if cached is not None:
+            # Item неизменяем, защитная копия не нужна
+            return cached
+
+        generation = self._cache_generation
+        with self._read_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SQL_GET_ITEM, (item_id,))
+            row = cursor.fetchone()
+
         if row:
-            return dict(row)
+            item = Item._make(row)
+            # Вставка и вытеснение под блокировкой: get_item зовется
+            # конкурентно из threadpool'а FastAPI, а параллельные
+            # update/delete инвалидируют кэш через ту же блокировку.
+            # Если за время SELECT данные изменились (поколение выросло),
+            # строку не кэшируем — она может быть уже удалена/устаревшей
+            with self._write_lock:
+                if self._cache_generation == generation:
+                    if len(self._item_cache) >= _ITEM_CACHE_MAX:
+                        # Вытесняем самую старую запись (dict упорядочен);
+                        # pop с default — ключ мог исчезнуть до блокировки
+                        oldest = next(iter(self._item_cache), None)
+                        if oldest is not None:
+                            self._item_cache.pop(oldest, None)
+                    self._item_cache[item_id] = item
+            return item
         return None
     
-    def get_all_items(self) -> List[Dict[str, Any]]:
+    def get_items(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Получение нескольких товаров одним запросом.
+
+        Один SELECT ... WHERE id IN (...) вместо N отдельных запросов.
+
+        Args:
+            ids: Список ID товаров
+
+        Returns:
+            Словарь {id: данные товара}; отсутствующие ID опускаются.
+            Выбираются только колонки, нужные для расчета (без
+            генерируемой total_cost — её вычисляет вызывающий код).
+        """
+        if not ids:
+            return {}
+
+        placeholders = ", ".join("?" * len(ids))
+        with self._read_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT id, name, price, amortization_months, monthly_cost
+                FROM tmc WHERE id IN ({placeholders})
+            """, ids)
+
+            return {row['id']: dict(row) for row in cursor.fetchall()}
+
+    def get_items_by_ids(self, ids: List[int]) -> Dict[int, Item]:
+        """
+        Получение полных строк нескольких товаров одним запросом.
+
+        В отличие от get_items, возвращает все колонки (как get_item):
+        один SELECT ... WHERE id IN (...) вместо запроса на каждый ID.
+
+        Args:
+            ids: Список ID товаров
+
+        Returns:
+            Словарь {id: Item}; отсутствующие ID опускаются
+        """
+        if not ids:
+            return {}
+
+        placeholders = ", ".join("?" * len(ids))
+        with self._read_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT * FROM tmc WHERE id IN ({placeholders})", ids)
+
+            return {row[0]: Item._make(row) for row in cursor.fetchall()}
+
+    def sum_monthly_cost(self, ids: List[int]) -> float:
+        """
+        Сумма месячной стоимости выбранных товаров.
+
+        Суммирование идет по колонке monthly_cost, закэшированной в
+        памяти (см. _monthly_costs), через map/filter без Python-цикла
+        по словарям строк.
+
+        Args:
+            ids: Список ID товаров (отсутствующие ID игнорируются)
+
+        Returns:
+            Сумма monthly_cost по найденным товарам
+        """
+        if not ids:
+            return 0.0
+
+        # filter(None, ...) отбрасывает None отсутствующих ID;
+        # нулевые стоимости он тоже пропустит, но к сумме они ничего не добавляют
+        return float(sum(filter(None, map(self._monthly_costs().get, ids))))
+
+    def get_all_items(self) -> List[Item]:
         """
         Получение всех товаров из базы.
-        
+
         Returns:
-            Список словарей с данными товаров
+            Список строк товаров (Item)
         """
-        cursor = self.connection.cursor()
-        cursor.execute("SELECT * FROM tmc ORDER BY id")
-        rows = cursor.fetchall()
-        
-        return [dict(row) for row in rows]
+        cached = self._all_items_cache
+        if cached is not None:
+            return cached
+
+        generation = self._cache_generation
+        with self._read_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SQL_GET_ALL_ITEMS)
+            rows = cursor.fetchall()
+
+        items = [Item._make(row) for row in rows]
+        # Кэшируем только если за время SELECT не было изменений:
+        # иначе устаревший список пережил бы инвалидацию _mark_dirty
+        with self._write_lock:
+            if self._cache_generation == generation:
+                self._all_items_cache = items
+        return items
     
+    def get_all_items_fast(self) -> List[Tuple]:
+        """
+        Получение всех товаров в виде сырых кортежей.
+
+        Не создает словарь на каждую строку (порядок колонок — COLUMNS);
+        для больших каталогов заметно дешевле, чем get_all_items.
+
+        Returns:
+            Список кортежей в порядке COLUMNS
+        """
+        with self._read_conn() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None  # без обертки sqlite3.Row
+            cursor.execute(_SQL_GET_ALL_ITEMS)
+
+            return cursor.fetchall()
+
     def update_item(
         self,
         item_id: int,
@@ -125,19 +544,23 @@ class TMCDatabase:
         price: Optional[float] = None,
         quantity: Optional[int] = None,
         amortization_months: Optional[int] = None
-    ) -> bool:
+    ) -> Optional[Item]:
         """
         Обновление данных товара.
-        
+
+        UPDATE выполняется с RETURNING *, поэтому обновленная строка
+        возвращается сразу — без повторного SELECT для отображения.
+
         Args:
             item_id: ID товара
             name: Новое название (опционально)
             price: Новая цена (опционально)
             quantity: Новое количество (опционально)
             amortization_months: Новый срок амортизации (опционально)
-            
+
         Returns:
-            True если обновление успешно, False если товар не найден
+            Обновленная строка товара (Item) или None, если товар
+            не найден (или не передано ни одного нового значения)
         """
         updates = []
         params = []
@@ -162,17 +585,25 @@ class TMCDatabase:
             params.append(amortization_months)
         
         if not updates:
-            return False
-        
+            return None
+
         updates.append("updated_at = CURRENT_TIMESTAMP")
         params.append(item_id)
-        
-        cursor = self.connection.cursor()
-        query = f"UPDATE tmc SET {', '.join(updates)} WHERE id = ?"
-        cursor.execute(query, params)
-        self.connection.commit()
-        
-        return cursor.rowcount > 0
+
+        with self._write_lock:
+            self._item_cache.pop(item_id, None)
+            self._mark_dirty()
+            cursor = self.connection.cursor()
+            query = f"UPDATE tmc SET {', '.join(updates)} WHERE id = ? RETURNING *"
+            row = cursor.execute(query, params).fetchone()
+            self._commit()
+
+            if row is None:
+                return None
+
+            item = Item._make(row)
+            self._item_cache[item_id] = item
+            return item
     
     def delete_item(self, item_id: int) -> bool:
         """
@@ -184,11 +615,14 @@ class TMCDatabase:
         Returns:
             True если удаление успешно, False если товар не найден
         """
-        cursor = self.connection.cursor()
-        cursor.execute("DELETE FROM tmc WHERE id = ?", (item_id,))
-        self.connection.commit()
-        
-        return cursor.rowcount > 0
+        with self._write_lock:
+            self._item_cache.pop(item_id, None)
+            self._mark_dirty()
+            cursor = self.connection.cursor()
+            cursor.execute(_SQL_DELETE_ITEM, (item_id,))
+            self._commit()
+
+            return cursor.rowcount > 0
     
     def get_total_monthly_cost(self) -> float:
         """
@@ -197,11 +631,12 @@ class TMCDatabase:
         Returns:
             Сумма месячных затрат на амортизацию
         """
-        cursor = self.connection.cursor()
-        cursor.execute("SELECT SUM(monthly_cost) as total FROM tmc")
-        result = cursor.fetchone()
-        
-        return result['total'] if result['total'] else 0.0
+        with self._read_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SQL_TOTAL_MONTHLY)
+            result = cursor.fetchone()
+
+        return result['total_monthly_cost'] if result else 0.0
     
     def get_summary(self) -> Dict[str, Any]:
         """
@@ -210,21 +645,29 @@ class TMCDatabase:
         Returns:
             Словарь со сводной информацией
         """
-        cursor = self.connection.cursor()
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total_items,
-                SUM(quantity) as total_quantity,
-                SUM(total_cost) as total_investment,
-                SUM(monthly_cost) as total_monthly_cost
-            FROM tmc
-        """)
-        result = cursor.fetchone()
-        
-        return dict(result) if result else {}
+        cached = self._summary_cache
+        if cached is not None:
+            return cached
+
+        generation = self._cache_generation
+        with self._read_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SQL_SUMMARY)
+            result = cursor.fetchone()
+
+        summary = dict(result) if result else {}
+        # Та же защита от гонки, что и в get_all_items/get_item
+        with self._write_lock:
+            if self._cache_generation == generation:
+                self._summary_cache = summary
+        return summary
     
     def close(self):
-        """Закрытие соединения с базой данных."""
+        """Закрытие соединений с базой данных."""
+        if self._readers is not None:
+            while not self._readers.empty():
+                self._readers.get_nowait().close()
+            self._readers = None
         if self.connection:
             self.connection.close()
     
@@ -237,53 +680,118 @@ class TMCDatabase:
         self.close()
 
 
-def print_item(item: Dict[str, Any]):
+def ensure_schema(db_path: str = "tmc.db"):
+    """
+    Одноразовая инициализация схемы базы данных.
+
+    Вызывается при старте приложения; последующие TMCDatabase(db_path)
+    увидят актуальный PRAGMA user_version и пропустят создание таблиц.
+    """
+    TMCDatabase(db_path).close()
+
+
+# Общий экземпляр базы для интерактивных сессий: открывается лениво
+# при первом обращении и живет до конца процесса
+_shared_db: Optional[TMCDatabase] = None
+
+
+def get_shared_db() -> TMCDatabase:
+    """
+    Ленивый общий экземпляр TMCDatabase для интерактивных режимов.
+
+    Открытие соединения (PRAGMA, проверка схемы) выполняется один раз
+    за сессию, а не на каждое обращение к базе из меню; соединение
+    закрывается через atexit при завершении процесса.
+
+    Returns:
+        Общий экземпляр TMCDatabase
+    """
+    global _shared_db
+    if _shared_db is None:
+        _shared_db = TMCDatabase()
+        atexit.register(_shared_db.close)
+    return _shared_db
+
+
+# Привязанные методы форматирования денег: один и тот же C-путь
+# str.format без поиска метода и разбора спецификатора в f-строке
+_fmt_price = "{:,.2f}".format
+_fmt_cell = "{:>13,.2f}".format
+
+
+def print_item(item: Item):
     """Красивый вывод информации о товаре."""
-    print(f"\n{'=' * 80}")
-    print(f"ID: {item['id']}")
-    print(f"Название: {item['name']}")
-    print(f"Цена за единицу: {item['price']:,.2f} ₸")
-    print(f"Количество: {item['quantity']} шт.")
-    print(f"Общая стоимость: {item['total_cost']:,.2f} ₸")
-    print(f"Срок амортизации: {item['amortization_months']} мес.")
-    print(f"Стоимость в месяц: {item['monthly_cost']:,.2f} ₸")
-    print(f"{'=' * 80}")
-
-
-def print_all_items(items: List[Dict[str, Any]]):
-    """Красивый вывод всех товаров в виде таблицы."""
+    # Карточка собирается в одну строку и пишется одним вызовом
+    sys.stdout.write(
+        f"\n{'=' * 80}\n"
+        f"ID: {item.id}\n"
+        f"Название: {item.name}\n"
+        f"Цена за единицу: {_fmt_price(item.price)} ₸\n"
+        f"Количество: {item.quantity} шт.\n"
+        f"Общая стоимость: {_fmt_price(item.total_cost)} ₸\n"
+        f"Срок амортизации: {item.amortization_months} мес.\n"
+        f"Стоимость в месяц: {_fmt_price(item.monthly_cost)} ₸\n"
+        f"{'=' * 80}\n"
+    )
+
+
+def print_all_items(items: List[Item], limit: Optional[int] = None):
+    """
+    Красивый вывод всех товаров в виде таблицы.
+
+    Args:
+        items: Список товаров
+        limit: Максимум строк в таблице; остальные сворачиваются
+            в строку '... и ещё N' (None — показать все)
+    """
     if not items:
         print("\n📦 База данных пуста")
         return
-    
-    print(f"\n{'=' * 120}")
-    print(f"{'ID':<5} {'Название':<30} {'Цена':<15} {'Кол-во':<8} {'Стоимость':<15} {'Амортизация':<15} {'В месяц':<15}")
-    print(f"{'=' * 120}")
-    
+
+    hidden = 0
+    if limit is not None and len(items) > limit:
+        hidden = len(items) - limit
+        items = items[:limit]
+
+    # Собираем таблицу в буфер и пишем одним вызовом:
+    # один syscall вместо syscall'а на каждую строку
+    buf = [
+        f"\n{'=' * 120}",
+        f"{'ID':<5} {'Название':<30} {'Цена':<15} {'Кол-во':<8} {'Стоимость':<15} {'Амортизация':<15} {'В месяц':<15}",
+        f"{'=' * 120}",
+    ]
+
     for item in items:
-        print(
-            f"{item['id']:<5} "
-            f"{item['name']:<30} "
-            f"{item['price']:>13,.2f} ₸ "
-            f"{item['quantity']:>6} шт "
-            f"{item['total_cost']:>13,.2f} ₸ "
-            f"{item['amortization_months']:>13} мес "
-            f"{item['monthly_cost']:>13,.2f} ₸"
+        buf.append(
+            f"{item.id:<5} "
+            f"{item.name:<30} "
+            f"{_fmt_cell(item.price)} ₸ "
+            f"{item.quantity:>6} шт "
+            f"{_fmt_cell(item.total_cost)} ₸ "
+            f"{item.amortization_months:>13} мес "
+            f"{_fmt_cell(item.monthly_cost)} ₸"
         )
-    
-    print(f"{'=' * 120}")
+
+    if hidden:
+        buf.append(f"... и ещё {hidden} товаров (пункт меню 1 покажет все)")
+
+    buf.append(f"{'=' * 120}")
+    sys.stdout.write("\n".join(buf) + "\n")
+    sys.stdout.flush()
 
 
 def print_summary(summary: Dict[str, Any]):
     """Красивый вывод сводной информации."""
-    print(f"\n{'=' * 80}")
-    print("📊 СВОДНАЯ ИНФОРМАЦИЯ")
-    print(f"{'=' * 80}")
-    print(f"Всего позиций: {summary.get('total_items', 0)}")
-    print(f"Общее количество: {summary.get('total_quantity', 0)} шт.")
-    print(f"Общие инвестиции: {summary.get('total_investment', 0):,.2f} ₸")
-    print(f"Итого в месяц: {summary.get('total_monthly_cost', 0):,.2f} ₸")
-    print(f"{'=' * 80}")
+    sys.stdout.write(
+        f"\n{'=' * 80}\n"
+        "📊 СВОДНАЯ ИНФОРМАЦИЯ\n"
+        f"{'=' * 80}\n"
+        f"Всего позиций: {summary.get('total_items', 0)}\n"
+        f"Общее количество: {summary.get('total_quantity', 0)} шт.\n"
+        f"Общие инвестиции: {_fmt_price(summary.get('total_investment', 0))} ₸\n"
+        f"Итого в месяц: {_fmt_price(summary.get('total_monthly_cost', 0))} ₸\n"
+        f"{'=' * 80}\n"
+    )
 
 
 # Пример использования
@@ -2,46 +2,94 @@
 FastAPI Backend для калькулятора стоимости охранных услуг
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any
-import math
+from functools import lru_cache
+import asyncio
 
-from database import TMCDatabase
-from salary_calculator import full_salary_breakdown
+from database import TMCDatabase, COLUMNS
+from salary_calculator import SalaryBreakdown, full_salary_breakdown
 
-app = FastAPI(title="Security Cost Calculator API", version="2.0")
+# orjson сериализует ответы в разы быстрее стандартного json
+app = FastAPI(
+    title="Security Cost Calculator API",
+    version="2.0",
+    default_response_class=ORJSONResponse
+)
+
+
+# Одно соединение с БД на весь процесс: открывать/закрывать SQLite
+# на каждый запрос слишком дорого (connect + CREATE TABLE + commit)
+@app.on_event("startup")
+async def startup():
+    """Инициализация ресурсов приложения."""
+    # Пул читателей: GET-запросы из threadpool'а не ждут друг друга
+    app.state.db = TMCDatabase("tmc.db", readers=4)
+
+    # Прогрев горячих запросов: подготовленные выражения и страничный
+    # кэш SQLite заполняются при старте, а не на первом запросе
+    app.state.db.get_summary()
+    app.state.db.get_all_items()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Освобождение ресурсов приложения."""
+    app.state.db.close()
+
+
+def get_db(request: Request) -> TMCDatabase:
+    """Зависимость FastAPI: общий экземпляр базы данных ТМЦ."""
+    return request.app.state.db
 
 # Модели данных
 class StaffGroup(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
     position: str = Field(..., description="Должность")
     count: int = Field(..., gt=0, description="Количество человек")
     net_salary: float = Field(..., gt=0, description="ЗП на руки")
 
 class Post(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
     post_number: int = Field(..., gt=0, description="Номер поста")
     hours_per_day: int = Field(..., gt=0, le=24, description="Часов в день")
     days_per_week: int = Field(..., gt=0, le=7, description="Дней в неделю")
     staff: List[StaffGroup] = Field(..., description="Персонал")
 
 class TMCItem(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
     item_id: int = Field(..., description="ID товара из БД")
     quantity: int = Field(..., gt=0, description="Количество")
 
 class CalculationRequest(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
     posts: List[Post] = Field(..., description="Список постов")
     tmc_items: List[TMCItem] = Field(default=[], description="ТМЦ")
     markup_percent: float = Field(default=20.0, ge=0, description="Маржа в %")
 
 class TMCCreateRequest(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
     name: str = Field(..., description="Название")
     price: float = Field(..., gt=0, description="Цена")
     quantity: int = Field(..., gt=0, description="Количество")
     amortization_months: int = Field(..., gt=0, description="Срок амортизации")
 
+class TMCBulkCreateRequest(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
+    items: List[TMCCreateRequest] = Field(..., description="Список товаров")
+
 class TMCUpdateRequest(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
     name: Optional[str] = None
     price: Optional[float] = None
     quantity: Optional[int] = None
@@ -49,187 +97,255 @@ class TMCUpdateRequest(BaseModel):
 
 
 # Вспомогательные функции
+
+# С какого количества постов расчет уходит в threadpool:
+# на мелких запросах накладные расходы диспетчеризации не окупаются
+PARALLEL_POSTS_THRESHOLD = 20
+
+# Всего 24×7 возможных графиков — считаем таблицу один раз при импорте.
+# 30.4/7 = 152/35, поэтому ОКРУГЛВВЕРХ считается целочисленно
+MONTHLY_HOURS = [
+    [(152 * h * d + 34) // 35 for d in range(8)]
+    for h in range(25)
+]
+
+
 def calculate_monthly_hours(hours_per_day: int, days_per_week: int) -> int:
-    """Расчет часов в месяц."""
-    hours = (30.4 / 7) * hours_per_day * days_per_week
-    return math.ceil(hours)
+    """Расчет часов в месяц (по предвычисленной таблице)."""
+    return MONTHLY_HOURS[hours_per_day][days_per_week]
 
 
-# API Endpoints
+@lru_cache(maxsize=1024)
+def _cached_breakdown(net_salary: float) -> SalaryBreakdown:
+    """
+    Кэш расчета зарплаты по уникальной ЗП на руки.
+
+    Группы с одинаковой ЗП встречаются в каждом втором запросе —
+    кэш избавляет от повторного обращения net -> gross.
+    SalaryBreakdown заморожен, поэтому запись в кэше
+    нельзя случайно изменить.
+    """
+    return full_salary_breakdown(net_salary, has_deduction=True)
+
+
+def _aggregate_post_costs(posts: List[Post]) -> tuple:
+    """
+    Числовое ядро расчета: один проход по постам и группам персонала.
+
+    Вынесено из обработчика, чтобы арифметика была отделена
+    от формирования HTTP-ответа.
 
-@app.get("/", response_class=HTMLResponse)
-async def root():
-    """Главная страница."""
-    return FileResponse("static/index.html")
+    Returns:
+        (posts_data, total_labor_cost, total_monthly_hours)
+    """
+    posts_data = []
+    total_labor_cost = 0.0
+    total_monthly_hours = 0
+
+    for post in posts:
+        monthly_hours = calculate_monthly_hours(post.hours_per_day, post.days_per_week)
+
+        staff_details = []
+        post_labor_cost = 0.0
+
+        for staff_group in post.staff:
+            # Расчет на одного сотрудника
+            salary_breakdown = _cached_breakdown(staff_group.net_salary)
+
+            # Умножаем на количество
+            group_cost = salary_breakdown.total_cost * staff_group.count
+            post_labor_cost += group_cost
+
+            staff_details.append({
+                'position': staff_group.position,
+                'count': staff_group.count,
+                'net_salary': staff_group.net_salary,
+                'gross_salary': salary_breakdown.gross,
+                'total_cost_per_person': salary_breakdown.total_cost,
+                'total_cost_group': group_cost
+            })
+
+        posts_data.append({
+            'post_number': post.post_number,
+            'schedule': f"{post.hours_per_day}/{post.days_per_week}",
+            'monthly_hours': monthly_hours,
+            'staff_details': staff_details,
+            'total_labor_cost': post_labor_cost
+        })
+
+        total_labor_cost += post_labor_cost
+        total_monthly_hours += monthly_hours
 
+    return posts_data, total_labor_cost, total_monthly_hours
+
+
+# API Endpoints
 
 @app.post("/api/calculate")
-async def calculate_security_cost(request: CalculationRequest) -> Dict[str, Any]:
+async def calculate_security_cost(
+    request: CalculationRequest,
+    db: TMCDatabase = Depends(get_db)
+) -> ORJSONResponse:
     """
     Расчет стоимости охранных услуг.
     """
+    # Расчет по постам; крупные сметы считаем в threadpool,
+    # чтобы не блокировать event loop другим запросам
     try:
-        posts_data = []
-        total_labor_cost = 0
-        total_monthly_hours = 0
-        
-        # Расчет по постам
-        for post in request.posts:
-            monthly_hours = calculate_monthly_hours(post.hours_per_day, post.days_per_week)
-            
-            staff_details = []
-            post_labor_cost = 0
-            
-            for staff_group in post.staff:
-                # Расчет на одного сотрудника
-                salary_breakdown = full_salary_breakdown(staff_group.net_salary, has_deduction=True)
-                
-                # Умножаем на количество
-                group_cost = salary_breakdown['total_cost'] * staff_group.count
-                post_labor_cost += group_cost
-                
-                staff_details.append({
-                    'position': staff_group.position,
-                    'count': staff_group.count,
-                    'net_salary': staff_group.net_salary,
-                    'gross_salary': salary_breakdown['gross_salary'],
-                    'total_cost_per_person': salary_breakdown['total_cost'],
-                    'total_cost_group': group_cost
-                })
-            
-            posts_data.append({
-                'post_number': post.post_number,
-                'schedule': f"{post.hours_per_day}/{post.days_per_week}",
-                'monthly_hours': monthly_hours,
-                'staff_details': staff_details,
-                'total_labor_cost': post_labor_cost
-            })
-            
-            total_labor_cost += post_labor_cost
-            total_monthly_hours += monthly_hours
-        
-        # Расчет ТМЦ
-        tmc_data = []
-        total_tmc_cost = 0
-        
-        with TMCDatabase() as db:
-            for tmc_item in request.tmc_items:
-                item = db.get_item(tmc_item.item_id)
-                if not item:
-                    raise HTTPException(status_code=404, detail=f"ТМЦ с ID {tmc_item.item_id} не найден")
-                
-                item_monthly_cost = item['monthly_cost'] * tmc_item.quantity
-                total_tmc_cost += item_monthly_cost
-                
-                tmc_data.append({
-                    'id': item['id'],
-                    'name': item['name'],
-                    'price': item['price'],
-                    'quantity': tmc_item.quantity,
-                    'total_cost': item['price'] * tmc_item.quantity,
-                    'amortization_months': item['amortization_months'],
-                    'monthly_cost': item_monthly_cost
-                })
-        
-        # Итоговая стоимость
-        total_cost = total_labor_cost + total_tmc_cost
-        markup_amount = total_cost * (request.markup_percent / 100)
-        final_price = total_cost + markup_amount
-        
-        # Тариф за час
-        hourly_rate = final_price / total_monthly_hours if total_monthly_hours > 0 else 0
-        
-        return {
-            'posts': posts_data,
-            'tmc': tmc_data,
-            'summary': {
-                'total_posts': len(request.posts),
-                'total_monthly_hours': total_monthly_hours,
-                'total_labor_cost': round(total_labor_cost, 2),
-                'total_tmc_cost': round(total_tmc_cost, 2),
-                'subtotal': round(total_cost, 2),
-                'markup_percent': request.markup_percent,
-                'markup_amount': round(markup_amount, 2),
-                'final_price': round(final_price, 2),
-                'hourly_rate': round(hourly_rate, 2)
-            }
-        }
+        if len(request.posts) >= PARALLEL_POSTS_THRESHOLD:
+            posts_data, total_labor_cost, total_monthly_hours = \
+                await asyncio.get_running_loop().run_in_executor(
+                    None, _aggregate_post_costs, request.posts
+                )
+        else:
+            posts_data, total_labor_cost, total_monthly_hours = _aggregate_post_costs(request.posts)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Расчет ТМЦ
+    tmc_data = []
+    total_tmc_cost = 0
     
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # Один запрос на все ТМЦ вместо запроса на каждую позицию
+    items = db.get_items([tmc_item.item_id for tmc_item in request.tmc_items])
+
+    for tmc_item in request.tmc_items:
+        item = items.get(tmc_item.item_id)
+        if not item:
+            raise HTTPException(status_code=404, detail=f"ТМЦ с ID {tmc_item.item_id} не найден")
+
+        item_monthly_cost = item['monthly_cost'] * tmc_item.quantity
+        total_tmc_cost += item_monthly_cost
+
+        tmc_data.append({
+            'id': item['id'],
+            'name': item['name'],
+            'price': item['price'],
+            'quantity': tmc_item.quantity,
+            'total_cost': item['price'] * tmc_item.quantity,
+            'amortization_months': item['amortization_months'],
+            'monthly_cost': item_monthly_cost
+        })
+    
+    # Итоговая стоимость: считаем и округляем одним пакетом
+    total_cost = total_labor_cost + total_tmc_cost
+    markup_amount = total_cost * (request.markup_percent / 100)
+    final_price = total_cost + markup_amount
+    hourly_rate = final_price / total_monthly_hours if total_monthly_hours > 0 else 0
+
+    total_labor_cost, total_tmc_cost, total_cost, markup_amount, final_price, hourly_rate = (
+        round(value, 2)
+        for value in (total_labor_cost, total_tmc_cost, total_cost,
+                      markup_amount, final_price, hourly_rate)
+    )
+
+    # Готовый ORJSONResponse минует повторную валидацию/кодирование
+    # ответа в FastAPI — словарь сериализуется orjson напрямую
+    return ORJSONResponse({
+        'posts': posts_data,
+        'tmc': tmc_data,
+        'summary': {
+            'total_posts': len(request.posts),
+            'total_monthly_hours': total_monthly_hours,
+            'total_labor_cost': total_labor_cost,
+            'total_tmc_cost': total_tmc_cost,
+            'subtotal': total_cost,
+            'markup_percent': request.markup_percent,
+            'markup_amount': markup_amount,
+            'final_price': final_price,
+            'hourly_rate': hourly_rate
+        }
+    })
 
 
 @app.get("/api/tmc")
-async def get_all_tmc() -> List[Dict[str, Any]]:
+async def get_all_tmc(db: TMCDatabase = Depends(get_db)) -> List[Dict[str, Any]]:
     """Получить все ТМЦ."""
-    with TMCDatabase() as db:
-        return db.get_all_items()
+    # Item — кортеж; для JSON-объектов клиента распаковываем в словари
+    return [item._asdict() for item in db.get_all_items()]
+
+
+@app.get("/api/tmc/raw")
+async def get_all_tmc_raw(db: TMCDatabase = Depends(get_db)) -> Dict[str, Any]:
+    """Получить все ТМЦ без пословарной упаковки (колонки + строки)."""
+    return {"columns": COLUMNS, "rows": db.get_all_items_fast()}
 
 
 @app.get("/api/tmc/{item_id}")
-async def get_tmc(item_id: int) -> Dict[str, Any]:
+async def get_tmc(item_id: int, db: TMCDatabase = Depends(get_db)) -> Dict[str, Any]:
     """Получить ТМЦ по ID."""
-    with TMCDatabase() as db:
-        item = db.get_item(item_id)
-        if not item:
-            raise HTTPException(status_code=404, detail="ТМЦ не найден")
-        return item
+    item = db.get_item(item_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="ТМЦ не найден")
+    return item._asdict()
 
 
 @app.post("/api/tmc")
-async def create_tmc(request: TMCCreateRequest) -> Dict[str, Any]:
+async def create_tmc(request: TMCCreateRequest, db: TMCDatabase = Depends(get_db)) -> Dict[str, Any]:
     """Создать новый ТМЦ."""
     try:
-        with TMCDatabase() as db:
-            item_id = db.add_item(
-                request.name,
-                request.price,
-                request.quantity,
-                request.amortization_months
-            )
-            return db.get_item(item_id)
+        item_id = db.add_item(
+            request.name,
+            request.price,
+            request.quantity,
+            request.amortization_months
+        )
+        return db.get_item(item_id)._asdict()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/tmc/bulk")
+async def create_tmc_bulk(request: TMCBulkCreateRequest, db: TMCDatabase = Depends(get_db)) -> Dict[str, int]:
+    """Массовое создание ТМЦ одной транзакцией."""
+    try:
+        count = db.add_items_bulk([
+            (item.name, item.price, item.quantity, item.amortization_months)
+            for item in request.items
+        ])
+        return {"created": count}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.put("/api/tmc/{item_id}")
-async def update_tmc(item_id: int, request: TMCUpdateRequest) -> Dict[str, Any]:
+async def update_tmc(item_id: int, request: TMCUpdateRequest, db: TMCDatabase = Depends(get_db)) -> Dict[str, Any]:
     """Обновить ТМЦ."""
     try:
-        with TMCDatabase() as db:
-            success = db.update_item(
-                item_id,
-                request.name,
-                request.price,
-                request.quantity,
-                request.amortization_months
-            )
-            if not success:
-                raise HTTPException(status_code=404, detail="ТМЦ не найден")
-            return db.get_item(item_id)
+        item = db.update_item(
+            item_id,
+            request.name,
+            request.price,
+            request.quantity,
+            request.amortization_months
+        )
+        if item is None:
+            raise HTTPException(status_code=404, detail="ТМЦ не найден")
+        return item._asdict()
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.delete("/api/tmc/{item_id}")
-async def delete_tmc(item_id: int) -> Dict[str, str]:
+async def delete_tmc(item_id: int, db: TMCDatabase = Depends(get_db)) -> Dict[str, str]:
     """Удалить ТМЦ."""
-    with TMCDatabase() as db:
-        success = db.delete_item(item_id)
-        if not success:
-            raise HTTPException(status_code=404, detail="ТМЦ не найден")
-        return {"message": "ТМЦ удален"}
+    success = db.delete_item(item_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="ТМЦ не найден")
+    return {"message": "ТМЦ удален"}
 
 
 @app.get("/api/tmc/summary")
-async def get_tmc_summary() -> Dict[str, Any]:
+async def get_tmc_summary(db: TMCDatabase = Depends(get_db)) -> Dict[str, Any]:
     """Получить сводку по ТМЦ."""
-    with TMCDatabase() as db:
-        return db.get_summary()
+    return db.get_summary()
 
 
-# Монтируем статические файлы
+# Монтируем статические файлы после всех /api/* маршрутов.
+# html=True отдает index.html на "/" средствами Starlette:
+# ETag/Last-Modified и 304 на условные запросы из коробки
 app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/", StaticFiles(directory="static", html=True), name="site")
 
 
 if __name__ == "__main__":
@@ -3,11 +3,13 @@
 Расчет стоимости постов охраны 24/7 с полной разбивкой затрат
 """
 
+import functools
+import re
 import sys
+from dataclasses import dataclass
+from operator import attrgetter
+from pathlib import Path
 from typing import Dict, Any, Optional, List
-from database import TMCDatabase
-from tmc_manager import select_items_for_calculation
-
 # ==================== КОНСТАНТЫ 2026 ====================
 MRP = 4325  # Месячный расчетный показатель
 MZP = 85000  # Минимальная заработная плата
@@ -27,10 +29,24 @@ OOSMS_RATE = 0.03  # 3% - Отчисления на ОСМС работодат
 IPN_THRESHOLD_ANNUAL_MRP = 8500  # МРП в год
 IPN_RATE_LOW = 0.10  # 10% до порога
 IPN_RATE_HIGH = 0.15  # 15% свыше порога
+_IPN_THRESHOLD_MONTHLY = (IPN_THRESHOLD_ANNUAL_MRP * MRP) / 12  # 708 333 тг/мес
+
+# Коэффициенты обращения net -> gross, свернутые один раз при импорте:
+# первый же расчет выполняется без подготовительной арифметики
+_EMPLOYEE_RATE = 1 - OPV_RATE - VOSMS_RATE  # доля gross после ОПВ и ВОСМС
+_INV_DENOM_LOW = _EMPLOYEE_RATE * (1 - IPN_RATE_LOW)
+_INV_DENOM_HIGH = _EMPLOYEE_RATE * (1 - IPN_RATE_HIGH)
+_INV_HIGH_OFFSET = _IPN_THRESHOLD_MONTHLY * (IPN_RATE_HIGH - IPN_RATE_LOW)
+
+# Коэффициенты работодателя от gross, свернутые один раз при импорте:
+# базы СО и СН (за вычетом удержаний работника) раскрыты в множители
+_SO_BASE_RATE = (1 - OPV_RATE) * SO_RATE  # СО от (ЗП - ОПВ)
+_SN_BASE_RATE = _EMPLOYEE_RATE * SN_RATE  # СН от (ЗП - ОПВ - ВОСМС)
+_TOTAL_EMPLOYER_RATE = OPVR_RATE + _SO_BASE_RATE + _SN_BASE_RATE + OOSMS_RATE
 
-# Настройки бинарного поиска
-BINARY_SEARCH_TOLERANCE = 1.0  # Точность 1 тенге
-BINARY_SEARCH_MULTIPLIER = 2.0  # Множитель для верхней границы
+# Настройки запасного численного решения (метод Ньютона)
+NEWTON_TOLERANCE = 0.01  # Точность 1 тиын
+NEWTON_MAX_ITER = 4  # Кусочно-линейная цель сходится за 2-3 итерации
 
 # Константы для охраны
 HOURS_PER_MONTH_AVG = 730  # Среднее количество часов в месяце (365*24/12)
@@ -39,6 +55,27 @@ DEFAULT_STAFF_PER_POST = 3  # Стандартное количество охр
 DEFAULT_MARKUP_PERCENT = 20.0  # Стандартная наценка
 
 
+# Разделители тысяч и пробелы убираются одним проходом регулярного
+# выражения вместо цепочки .strip().replace()
+_MONEY_RE = re.compile(r'[,\s_]')
+
+
+def _parse_money(text: str) -> float:
+    """
+    Разбор денежной суммы из пользовательского ввода.
+
+    Args:
+        text: Строка вида "250 000", "250,000" или "250_000"
+
+    Returns:
+        Число без разделителей тысяч
+
+    Raises:
+        ValueError: Если строка не является числом
+    """
+    return float(_MONEY_RE.sub('', text))
+
+
 # ==================== РАСЧЕТ ЗАРПЛАТЫ ====================
 
 def ipn_progressive(taxable_income_monthly: float) -> float:
@@ -55,121 +92,246 @@ def ipn_progressive(taxable_income_monthly: float) -> float:
     """
     if taxable_income_monthly <= 0:
         return 0.0
-    
-    threshold_monthly = (IPN_THRESHOLD_ANNUAL_MRP * MRP) / 12  # 708 333 тг/мес
-    
-    if taxable_income_monthly <= threshold_monthly:
+
+    if taxable_income_monthly <= _IPN_THRESHOLD_MONTHLY:
         return taxable_income_monthly * IPN_RATE_LOW
     else:
-        return (threshold_monthly * IPN_RATE_LOW + 
-                (taxable_income_monthly - threshold_monthly) * IPN_RATE_HIGH)
+        return (_IPN_THRESHOLD_MONTHLY * IPN_RATE_LOW +
+                (taxable_income_monthly - _IPN_THRESHOLD_MONTHLY) * IPN_RATE_HIGH)
 
 
-def calculate_gross_from_net(net_salary: float, has_deduction: bool = True) -> float:
+def _gross_newton(net_salary: float, has_deduction: bool = True) -> float:
     """
-    Расчет gross salary от net salary методом бинарного поиска.
-    
-    Логика:
-    1. gross = начисленная зарплата (искомая)
-    2. OPV = gross * 10%
-    3. VOSMS = gross * 2%
-    4. taxable = gross - OPV - VOSMS - BASE_DEDUCTION (если есть вычет)
-    5. IPN = ipn_progressive(taxable)
-    6. net = gross - OPV - VOSMS - IPN
-    
+    Запасной расчет gross методом Ньютона.
+
+    Зависимость net(gross) кусочно-линейная с известным наклоном на
+    каждом участке шкалы ИПН, поэтому шаг Ньютона попадает точно в
+    решение, как только угадан участок: 2-3 итерации вместо ~20 у
+    бинарного поиска. Оставлен для сверки с аналитическим решением.
+    """
+    deduction = BASE_DEDUCTION if has_deduction else 0.0
+    # Стартовая оценка: участок со ставкой ИПН 10%
+    gross = net_salary / _INV_DENOM_LOW
+
+    for _ in range(NEWTON_MAX_ITER):
+        taxable = gross * _EMPLOYEE_RATE - deduction
+
+        # Наклон net(gross) на текущем участке шкалы
+        if taxable <= 0:
+            slope = _EMPLOYEE_RATE
+        elif taxable <= _IPN_THRESHOLD_MONTHLY:
+            slope = _INV_DENOM_LOW
+        else:
+            slope = _INV_DENOM_HIGH
+
+        calculated_net = gross * _EMPLOYEE_RATE - ipn_progressive(max(0.0, taxable))
+        diff = net_salary - calculated_net
+        if abs(diff) <= NEWTON_TOLERANCE:
+            break
+        gross += diff / slope
+
+    return gross
+
+
+def _invert_net_to_gross(net_salary: float, deduction: float) -> tuple:
+    """
+    Ядро обращения net -> gross: только скалярная арифметика.
+
+    Вместе с gross возвращает удержания работника, уже вычисленные
+    на найденном участке шкалы, — вызывающему коду не нужно
+    пересчитывать их заново.
+
+    Из глобальных имен используются лишь числовые константы,
+    свернутые при импорте, — функция компилируема (numba и т.п.)
+    без изменений.
+
+    Returns:
+        Кортеж (gross, opv, vosms, ipn)
+    """
+    # Участок 1: весь доход покрыт вычетом, ИПН нет
+    # net = gross * _EMPLOYEE_RATE
+    gross = net_salary / _EMPLOYEE_RATE
+    if gross * _EMPLOYEE_RATE - deduction <= 0:
+        return gross, gross * OPV_RATE, gross * VOSMS_RATE, 0.0
+
+    # Участок 2: ИПН 10%
+    # net = gross * _EMPLOYEE_RATE * (1 - 10%) + 10% * вычет
+    gross = (net_salary - IPN_RATE_LOW * deduction) / _INV_DENOM_LOW
+    taxable = gross * _EMPLOYEE_RATE - deduction
+    if taxable <= _IPN_THRESHOLD_MONTHLY:
+        return gross, gross * OPV_RATE, gross * VOSMS_RATE, taxable * IPN_RATE_LOW
+
+    # Участок 3: ИПН 15% сверх порога
+    # net = gross * _EMPLOYEE_RATE * (1 - 15%) + 15% * вычет + порог * (15% - 10%)
+    gross = (net_salary - IPN_RATE_HIGH * deduction - _INV_HIGH_OFFSET) / _INV_DENOM_HIGH
+    taxable = gross * _EMPLOYEE_RATE - deduction
+    ipn = (_IPN_THRESHOLD_MONTHLY * IPN_RATE_LOW +
+           (taxable - _IPN_THRESHOLD_MONTHLY) * IPN_RATE_HIGH)
+    return gross, gross * OPV_RATE, gross * VOSMS_RATE, ipn
+
+
+def _gross_and_deductions_from_net(net_salary: float, has_deduction: bool = True) -> tuple:
+    """
+    Обращение net -> gross вместе с удержаниями работника.
+
     Args:
         net_salary: Желаемая зарплата на руки
         has_deduction: Применять ли базовый вычет 30 МРП
-        
+
     Returns:
-        Начисленная зарплата (gross)
-        
+        Кортеж (gross, opv, vosms, ipn)
+
     Raises:
         ValueError: Если net_salary <= 0
     """
     if net_salary <= 0:
         raise ValueError("Зарплата на руки должна быть больше нуля")
-    
-    # Бинарный поиск
-    lower = net_salary
-    upper = net_salary * BINARY_SEARCH_MULTIPLIER
-    
-    while upper - lower > BINARY_SEARCH_TOLERANCE:
-        gross_estimate = (lower + upper) / 2
-        
-        # Расчет удержаний
-        opv = gross_estimate * OPV_RATE
-        vosms = gross_estimate * VOSMS_RATE
-        
-        if has_deduction:
-            taxable = max(0, gross_estimate - opv - vosms - BASE_DEDUCTION)
-        else:
-            taxable = max(0, gross_estimate - opv - vosms)
-        
-        ipn = ipn_progressive(taxable)
-        calculated_net = gross_estimate - opv - vosms - ipn
-        
-        if calculated_net < net_salary:
-            lower = gross_estimate
-        else:
-            upper = gross_estimate
-    
-    return gross_estimate
 
+    return _invert_net_to_gross(net_salary, BASE_DEDUCTION if has_deduction else 0.0)
 
-def full_salary_breakdown(net_salary: float, has_deduction: bool = True) -> Dict[str, Any]:
+
+def calculate_gross_from_net(
+    net_salary: float,
+    has_deduction: bool = True,
+    _legacy: bool = False
+) -> float:
     """
-    Полный расчет с разбивкой всех платежей.
-    
+    Расчет gross salary от net salary аналитическим обращением.
+
+    Зависимость net(gross) кусочно-линейная (три участка: без ИПН,
+    ИПН 10%, ИПН 15%), поэтому обратная функция решается точно
+    на каждом участке:
+
+    1. OPV = gross * 10%, VOSMS = gross * 2%
+    2. taxable = gross - OPV - VOSMS - BASE_DEDUCTION (если есть вычет)
+    3. IPN = ipn_progressive(taxable)
+    4. net = gross - OPV - VOSMS - IPN
+
     Args:
         net_salary: Желаемая зарплата на руки
         has_deduction: Применять ли базовый вычет 30 МРП
-        
+        _legacy: Использовать численное решение методом Ньютона (для сверки)
+
     Returns:
-        Словарь с полной разбивкой зарплаты и платежей
+        Начисленная зарплата (gross)
+
+    Raises:
+        ValueError: Если net_salary <= 0
     """
-    gross = calculate_gross_from_net(net_salary, has_deduction)
-    
-    # Удержания работника
-    opv = gross * OPV_RATE
-    vosms = gross * VOSMS_RATE
-    
-    if has_deduction:
-        taxable = max(0, gross - opv - vosms - BASE_DEDUCTION)
-    else:
-        taxable = max(0, gross - opv - vosms)
-    
-    ipn = ipn_progressive(taxable)
+    if net_salary <= 0:
+        raise ValueError("Зарплата на руки должна быть больше нуля")
+
+    if _legacy:
+        return _gross_newton(net_salary, has_deduction)
+
+    return _gross_and_deductions_from_net(net_salary, has_deduction)[0]
+
+
+@dataclass(frozen=True, slots=True)
+class SalaryBreakdown:
+    """
+    Полная разбивка зарплаты: один неизменяемый объект вместо
+    вложенных словарей.
+
+    Доступ к полям — чтение слота на уровне C, без хеширования
+    строковых ключей; заморозка позволяет безопасно отдавать
+    закэшированный экземпляр без защитных копий.
+    """
+    gross: float
+    opv: float
+    vosms: float
+    ipn: float
+    deductions_total: float
+    net: float
+    opvr: float
+    so: float
+    sn: float
+    oosms: float
+    payments_total: float
+    total_cost: float
+    deduction_applied: bool
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Словарное представление в историческом формате API."""
+        return {
+            'gross_salary': self.gross,
+            'employee_deductions': {
+                'opv': self.opv,
+                'vosms': self.vosms,
+                'ipn': self.ipn,
+                'total': self.deductions_total
+            },
+            'net_salary': self.net,
+            'employer_payments': {
+                'opvr': self.opvr,
+                'so': self.so,
+                'sn': self.sn,
+                'oosms': self.oosms,
+                'total': self.payments_total
+            },
+            'total_cost': self.total_cost,
+            'deduction_applied': self.deduction_applied
+        }
+
+
+@functools.lru_cache(maxsize=256)
+def _full_salary_breakdown_cached(net_salary: float, has_deduction: bool) -> SalaryBreakdown:
+    """Кэшируемая часть расчета: чистая функция от (net, вычет)."""
+    # Удержания работника приходят готовыми из обращения net -> gross
+    gross, opv, vosms, ipn = _gross_and_deductions_from_net(net_salary, has_deduction)
     net_calculated = gross - opv - vosms - ipn
-    
-    # Платежи работодателя
-    so = (gross - opv) * SO_RATE  # СО = 5% от (ЗП - ОПВ)
+
+    # Платежи работодателя: одно умножение gross на свернутый коэффициент
+    so = gross * _SO_BASE_RATE  # СО = 5% от (ЗП - ОПВ)
     oosms = gross * OOSMS_RATE  # ООСМС = 3% от ЗП
-    sn = (gross - opv - vosms) * SN_RATE  # СН = 6% от (ЗП - ОПВ - ВОСМС)
+    sn = gross * _SN_BASE_RATE  # СН = 6% от (ЗП - ОПВ - ВОСМС)
     opvr = gross * OPVR_RATE  # ОПВР = 3.5% от ЗП
-    
+
     # Полная стоимость работника для компании
-    total_cost = gross + opvr + so + sn + oosms
-    
-    return {
-        'gross_salary': round(gross, 2),
-        'employee_deductions': {
-            'opv': round(opv, 2),
-            'vosms': round(vosms, 2),
-            'ipn': round(ipn, 2),
-            'total': round(opv + vosms + ipn, 2)
-        },
-        'net_salary': round(net_calculated, 2),
-        'employer_payments': {
-            'opvr': round(opvr, 2),
-            'so': round(so, 2),
-            'sn': round(sn, 2),
-            'oosms': round(oosms, 2),
-            'total': round(opvr + so + sn + oosms, 2)
-        },
-        'total_cost': round(total_cost, 2),
-        'deduction_applied': has_deduction
-    }
+    total_cost = gross * (1 + _TOTAL_EMPLOYER_RATE)
+
+    # Все 12 величин округляются одним пакетом перед сборкой результата
+    (gross, opv, vosms, ipn, deductions_total, net_calculated,
+     opvr, so, sn, oosms, payments_total, total_cost) = (
+        round(value, 2) for value in (
+            gross, opv, vosms, ipn, opv + vosms + ipn, net_calculated,
+            opvr, so, sn, oosms, opvr + so + sn + oosms, total_cost
+        )
+    )
+
+    return SalaryBreakdown(
+        gross=gross,
+        opv=opv,
+        vosms=vosms,
+        ipn=ipn,
+        deductions_total=deductions_total,
+        net=net_calculated,
+        opvr=opvr,
+        so=so,
+        sn=sn,
+        oosms=oosms,
+        payments_total=payments_total,
+        total_cost=total_cost,
+        deduction_applied=has_deduction
+    )
+
+
+def full_salary_breakdown(net_salary: float, has_deduction: bool = True) -> SalaryBreakdown:
+    """
+    Полный расчет с разбивкой всех платежей.
+
+    Результат кэшируется по (net_salary, has_deduction): одинаковые
+    оклады в разных группах персонала считаются один раз. Экземпляр
+    SalaryBreakdown заморожен, поэтому защитная копия не нужна.
+
+    Args:
+        net_salary: Желаемая зарплата на руки
+        has_deduction: Применять ли базовый вычет 30 МРП
+
+    Returns:
+        SalaryBreakdown с полной разбивкой зарплаты и платежей
+    """
+    return _full_salary_breakdown_cached(round(net_salary, 2), has_deduction)
 
 
 # ==================== РАСЧЕТ ОХРАННЫХ УСЛУГ ====================
@@ -209,13 +371,13 @@ def calculate_security_post_cost(
     salary_breakdown = full_salary_breakdown(net_salary_per_person, has_deduction=True)
     
     # Умножаем на количество сотрудников
-    total_gross = salary_breakdown['gross_salary'] * total_staff
-    total_employee_deductions = salary_breakdown['employee_deductions']['total'] * total_staff
-    total_net = salary_breakdown['net_salary'] * total_staff
-    total_employer_payments = salary_breakdown['employer_payments']['total'] * total_staff
-    
+    total_gross = salary_breakdown.gross * total_staff
+    total_employee_deductions = salary_breakdown.deductions_total * total_staff
+    total_net = salary_breakdown.net * total_staff
+    total_employer_payments = salary_breakdown.payments_total * total_staff
+
     # Итоговые затраты
-    total_labor_cost = salary_breakdown['total_cost'] * total_staff
+    total_labor_cost = salary_breakdown.total_cost * total_staff
     total_cost_with_additional = total_labor_cost + additional_costs_per_month
     
     # Стоимость с наценкой
@@ -237,15 +399,15 @@ def calculate_security_post_cost(
             'markup_percent': markup_percent
         },
         'per_employee': {
-            'gross_salary': salary_breakdown['gross_salary'],
-            'total_cost': salary_breakdown['total_cost'],
-            'opv': salary_breakdown['employee_deductions']['opv'],
-            'vosms': salary_breakdown['employee_deductions']['vosms'],
-            'ipn': salary_breakdown['employee_deductions']['ipn'],
-            'so': salary_breakdown['employer_payments']['so'],
-            'sn': salary_breakdown['employer_payments']['sn'],
-            'oosms': salary_breakdown['employer_payments']['oosms'],
-            'opvr': salary_breakdown['employer_payments']['opvr']
+            'gross_salary': salary_breakdown.gross,
+            'total_cost': salary_breakdown.total_cost,
+            'opv': salary_breakdown.opv,
+            'vosms': salary_breakdown.vosms,
+            'ipn': salary_breakdown.ipn,
+            'so': salary_breakdown.so,
+            'sn': salary_breakdown.sn,
+            'oosms': salary_breakdown.oosms,
+            'opvr': salary_breakdown.opvr
         },
         'total_monthly': {
             'gross_salaries': total_gross,
@@ -267,60 +429,93 @@ def calculate_security_post_cost(
 
 # ==================== ФОРМАТИРОВАНИЕ ВЫВОДА ====================
 
+# Шаблоны секций предложения: текст и разметка собираются один раз
+# при импорте, на вызов остается лишь подстановка значений через
+# format_map. Секции рендерятся каждая со своим словарем, поэтому
+# одноименные ключи ('total_cost' и т.п.) не конфликтуют.
+_QUOTE_HEADER = (
+    "=" * 80 +
+    "\nКОММЕРЧЕСКОЕ ПРЕДЛОЖЕНИЕ"
+    "\nУслуги охраны - расчет стоимости\n" +
+    "=" * 80
+)
+
+_QUOTE_CONFIG_TMPL = (
+    "\n\n📋 КОНФИГУРАЦИЯ:"
+    "\n   Количество постов:              {posts}"
+    "\n   График работы:                  24/7"
+    "\n   Сотрудников на пост:            {staff_per_post} чел."
+    "\n   Всего сотрудников:              {total_staff} чел."
+    "\n   ЗП на руки (1 чел.):            {net_salary:>12,.0f} ₸"
+)
+
+_QUOTE_EMPLOYEE_TMPL = (
+    "\n\n💼 РАСЧЕТ НА 1 СОТРУДНИКА:"
+    "\n   Начисленная ЗП:                 {gross_salary:>12,.0f} ₸"
+    "\n   │"
+    "\n   ├─ Удержания:"
+    "\n   │  ├─ ОПВ (10%):                {opv:>12,.0f} ₸"
+    "\n   │  ├─ ВОСМС (2%):               {vosms:>12,.0f} ₸"
+    "\n   │  └─ ИПН:                      {ipn:>12,.0f} ₸"
+    "\n   │"
+    "\n   └─ Платежи работодателя:"
+    "\n      ├─ СО (5%):                  {so:>12,.0f} ₸"
+    "\n      ├─ СН (6%):                  {sn:>12,.0f} ₸"
+    "\n      ├─ ООСМС (3%):               {oosms:>12,.0f} ₸"
+    "\n      └─ ОПВР (3.5%):              {opvr:>12,.0f} ₸"
+    "\n   " + "-" * 60 +
+    "\n   ПОЛНАЯ СТОИМОСТЬ (1 чел.):      {total_cost:>12,.0f} ₸"
+)
+
+_QUOTE_TOTALS_TMPL = (
+    "\n\n💰 ИТОГО ЗА МЕСЯЦ ({total_staff} чел.):"
+    "\n   Фонд оплаты труда:              {labor_cost:>12,.0f} ₸"
+)
+
+_QUOTE_ADDITIONAL_TMPL = (
+    "\n   Дополнительные расходы:         {additional_costs:>12,.0f} ₸"
+    "\n   " + "-" * 60 +
+    "\n   Себестоимость:                  {total_cost:>12,.0f} ₸"
+)
+
+_QUOTE_MARKUP_TMPL = (
+    "\n   Наценка ({markup_percent:.1f}%):                  {markup:>12,.0f} ₸"
+    "\n   " + "=" * 60 +
+    "\n   СТОИМОСТЬ УСЛУГИ:               {final_price:>12,.0f} ₸/мес"
+)
+
+_QUOTE_PER_POST_TMPL = (
+    "\n\n📍 СТОИМОСТЬ 1 ПОСТА:"
+    "\n   За месяц:                       {price:>12,.0f} ₸"
+    "\n   За час работы:                  {price_per_hour:>12,.2f} ₸"
+)
+
+_QUOTE_FOOTER = "\n\n" + "=" * 80
+
+
 def format_security_quote(result: Dict[str, Any]) -> str:
     """Форматирование коммерческого предложения по охране."""
     cfg = result['configuration']
     per = result['per_employee']
     total = result['total_monthly']
     post = result['per_post']
-    
-    lines = []
-    lines.append("=" * 80)
-    lines.append("КОММЕРЧЕСКОЕ ПРЕДЛОЖЕНИЕ")
-    lines.append("Услуги охраны - расчет стоимости")
-    lines.append("=" * 80)
-    
-    lines.append(f"\n📋 КОНФИГУРАЦИЯ:")
-    lines.append(f"   Количество постов:              {cfg['posts']}")
-    lines.append(f"   График работы:                  24/7")
-    lines.append(f"   Сотрудников на пост:            {cfg['staff_per_post']} чел.")
-    lines.append(f"   Всего сотрудников:              {cfg['total_staff']} чел.")
-    lines.append(f"   ЗП на руки (1 чел.):            {cfg['net_salary']:>12,.0f} ₸")
-    
-    lines.append(f"\n💼 РАСЧЕТ НА 1 СОТРУДНИКА:")
-    lines.append(f"   Начисленная ЗП:                 {per['gross_salary']:>12,.0f} ₸")
-    lines.append(f"   │")
-    lines.append(f"   ├─ Удержания:")
-    lines.append(f"   │  ├─ ОПВ (10%):                {per['opv']:>12,.0f} ₸")
-    lines.append(f"   │  ├─ ВОСМС (2%):               {per['vosms']:>12,.0f} ₸")
-    lines.append(f"   │  └─ ИПН:                      {per['ipn']:>12,.0f} ₸")
-    lines.append(f"   │")
-    lines.append(f"   └─ Платежи работодателя:")
-    lines.append(f"      ├─ СО (5%):                  {per['so']:>12,.0f} ₸")
-    lines.append(f"      ├─ СН (6%):                  {per['sn']:>12,.0f} ₸")
-    lines.append(f"      ├─ ООСМС (3%):               {per['oosms']:>12,.0f} ₸")
-    lines.append(f"      └─ ОПВР (3.5%):              {per['opvr']:>12,.0f} ₸")
-    lines.append(f"   {'-' * 60}")
-    lines.append(f"   ПОЛНАЯ СТОИМОСТЬ (1 чел.):      {per['total_cost']:>12,.0f} ₸")
-    
-    lines.append(f"\n💰 ИТОГО ЗА МЕСЯЦ ({cfg['total_staff']} чел.):")
-    lines.append(f"   Фонд оплаты труда:              {total['labor_cost']:>12,.0f} ₸")
-    if total['additional_costs'] > 0:
-        lines.append(f"   Дополнительные расходы:         {total['additional_costs']:>12,.0f} ₸")
-        lines.append(f"   {'-' * 60}")
-        lines.append(f"   Себестоимость:                  {total['total_cost']:>12,.0f} ₸")
-    lines.append(f"   Наценка ({cfg['markup_percent']:.1f}%):                  {total['markup']:>12,.0f} ₸")
-    lines.append(f"   {'=' * 60}")
-    lines.append(f"   СТОИМОСТЬ УСЛУГИ:               {total['final_price']:>12,.0f} ₸/мес")
-    
-    if cfg['posts'] > 1:
-        lines.append(f"\n📍 СТОИМОСТЬ 1 ПОСТА:")
-        lines.append(f"   За месяц:                       {post['price']:>12,.0f} ₸")
-        lines.append(f"   За час работы:                  {post['price_per_hour']:>12,.2f} ₸")
-    
-    lines.append("\n" + "=" * 80)
-    
-    return "\n".join(lines)
+
+    # Итоговым секциям нужны значения и конфигурации, и сумм за месяц;
+    # ключи этих словарей не пересекаются
+    totals_ns = {**cfg, **total}
+
+    parts = (
+        _QUOTE_HEADER,
+        _QUOTE_CONFIG_TMPL.format_map(cfg),
+        _QUOTE_EMPLOYEE_TMPL.format_map(per),
+        _QUOTE_TOTALS_TMPL.format_map(totals_ns),
+        _QUOTE_ADDITIONAL_TMPL.format_map(total) if total['additional_costs'] > 0 else "",
+        _QUOTE_MARKUP_TMPL.format_map(totals_ns),
+        _QUOTE_PER_POST_TMPL.format_map(post) if cfg['posts'] > 1 else "",
+        _QUOTE_FOOTER,
+    )
+
+    return "".join(parts)
 
 
 # ==================== ИНТЕРАКТИВНЫЙ РЕЖИМ ====================
@@ -338,7 +533,7 @@ def security_calculator_interactive():
         staff_input = input(f"Сотрудников на 1 пост (default={DEFAULT_STAFF_PER_POST}): ").strip()
         staff_per_post = int(staff_input) if staff_input else DEFAULT_STAFF_PER_POST
         
-        net_salary = float(input("ЗП на руки на 1 человека (₸): ").strip().replace(',', '').replace(' ', ''))
+        net_salary = _parse_money(input("ЗП на руки на 1 человека (₸): "))
         
         markup_input = input(f"Наценка/маржа (%, default={DEFAULT_MARKUP_PERCENT}): ").strip()
         markup = float(markup_input) if markup_input else DEFAULT_MARKUP_PERCENT
@@ -348,16 +543,25 @@ def security_calculator_interactive():
         
         use_tmc = input("\nИспользовать ТМЦ из базы данных? (y/n, default=n): ").strip().lower()
         if use_tmc in ['y', 'yes', 'да', 'д']:
-            with TMCDatabase() as db:
-                selected_items = select_items_for_calculation(db)
-                if selected_items:
-                    tmc_monthly_cost = sum(item['monthly_cost'] for item in selected_items)
-                    additional = tmc_monthly_cost
-                    print(f"\n✅ Добавлена стоимость ТМЦ: {tmc_monthly_cost:,.2f} ₸/мес")
+            # Модули базы данных нужны только этой ветке — импортируем
+            # лениво, чтобы не замедлять импорт калькулятора как библиотеки
+            from database import get_shared_db
+            from tmc_manager import select_items_for_calculation
+
+            # Общее соединение на всю сессию: повторные расчеты
+            # не платят за открытие базы заново
+            db = get_shared_db()
+            selected_items = select_items_for_calculation(db)
+            if selected_items:
+                # map + attrgetter суммирует на уровне C, без кадра
+                # генератора на каждую позицию
+                tmc_monthly_cost = sum(map(attrgetter('monthly_cost'), selected_items))
+                additional = tmc_monthly_cost
+                print(f"\n✅ Добавлена стоимость ТМЦ: {tmc_monthly_cost:,.2f} ₸/мес")
         else:
             # Дополнительные расходы (если не используем ТМЦ)
             additional_input = input("Доп. расходы в месяц (форма, оборудование, ₸, default=0): ").strip()
-            additional = float(additional_input.replace(',', '').replace(' ', '')) if additional_input else 0
+            additional = _parse_money(additional_input) if additional_input else 0
         
         print("\n🔄 Расчет...")
         
@@ -381,8 +585,8 @@ def security_calculator_interactive():
             filepath = f"{filename}.txt"
             
             try:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(output)
+                # Одна запись целиком вместо open/write/close по шагам
+                Path(filepath).write_text(output, encoding='utf-8')
                 print(f"✅ Сохранено: {filepath}")
             except IOError as e:
                 print(f"❌ Ошибка сохранения: {e}")
@@ -3,37 +3,47 @@
 Поддержка множественных постов с разными графиками и должностями
 """
 
+import functools
 import sys
-import math
-from typing import Dict, Any, List, Tuple
-from database import TMCDatabase, print_all_items
-
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
 # Импортируем функции расчета зарплаты
-from salary_calculator import full_salary_breakdown
+from salary_calculator import SalaryBreakdown, _parse_money, full_salary_breakdown
 
 # Константы
 DEFAULT_MARKUP_PERCENT = 20.0
 
 
+@functools.lru_cache(maxsize=32)
 def calculate_monthly_hours(hours_per_day: int, days_per_week: int) -> int:
     """
     Расчет количества часов в месяц по формуле:
     ОКРУГЛВВЕРХ(((30.4/7) * часы_в_день * рабочих_дней_в_неделю); 0)
-    
+
+    Функция чистая, а реальных графиков — считанные единицы
+    (8/5, 12/7, 24/7 и т.д.), поэтому результат кэшируется.
+
     Args:
         hours_per_day: Часов в день (8, 12, 24 и т.д.)
         days_per_week: Рабочих дней в неделю (5, 7 и т.д.)
-        
+
     Returns:
         Количество часов в месяц
     """
-    hours = (30.4 / 7) * hours_per_day * days_per_week
-    return math.ceil(hours)
+    # 30.4/7 = 152/35, поэтому ОКРУГЛВВЕРХ считается целочисленно:
+    # без плавающей точки результат детерминирован на любой платформе
+    return (152 * hours_per_day * days_per_week + 34) // 35
 
 
 class SecurityPost:
     """Класс для представления одного поста охраны."""
-    
+
+    # Фиксированный набор атрибутов: меньше памяти на экземпляр,
+    # доступ к полям быстрее, чем через __dict__
+    __slots__ = ('post_number', 'hours_per_day', 'days_per_week',
+                 'monthly_hours', 'staff')
+
     def __init__(self, post_number: int, hours_per_day: int, days_per_week: int):
         """
         Инициализация поста.
@@ -64,25 +74,34 @@ class SecurityPost:
             'net_salary': net_salary
         })
     
-    def calculate_cost(self) -> Dict[str, Any]:
-        """Расчет стоимости поста."""
+    def calculate_cost(self, breakdowns: Dict[float, SalaryBreakdown] = None) -> Dict[str, Any]:
+        """
+        Расчет стоимости поста.
+
+        Args:
+            breakdowns: Предрассчитанные разбивки зарплат по net-окладу
+                (опционально; без них считается на месте)
+        """
         total_labor_cost = 0
         staff_details = []
-        
+
         for staff_group in self.staff:
             # Расчет на одного сотрудника
-            salary_breakdown = full_salary_breakdown(staff_group['net_salary'], has_deduction=True)
+            if breakdowns is not None:
+                salary_breakdown = breakdowns[staff_group['net_salary']]
+            else:
+                salary_breakdown = full_salary_breakdown(staff_group['net_salary'], has_deduction=True)
             
             # Умножаем на количество
-            group_cost = salary_breakdown['total_cost'] * staff_group['count']
+            group_cost = salary_breakdown.total_cost * staff_group['count']
             total_labor_cost += group_cost
-            
+
             staff_details.append({
                 'position': staff_group['position'],
                 'count': staff_group['count'],
                 'net_salary': staff_group['net_salary'],
-                'gross_salary': salary_breakdown['gross_salary'],
-                'total_cost_per_person': salary_breakdown['total_cost'],
+                'gross_salary': salary_breakdown.gross,
+                'total_cost_per_person': salary_breakdown.total_cost,
                 'total_cost_group': group_cost
             })
         
@@ -97,50 +116,68 @@ class SecurityPost:
 
 class SecurityCalculator:
     """Главный калькулятор стоимости охраны."""
-    
+
+    __slots__ = ('posts', 'tmc_items', 'markup_percent')
+
     def __init__(self):
-        self.posts: List[SecurityPost] = []
+        # Посты хранятся по номеру: поиск поста — O(1), порядок
+        # добавления сохраняется (dict в CPython упорядочен)
+        self.posts: Dict[int, SecurityPost] = {}
         self.tmc_items: List[Tuple[Dict[str, Any], int]] = []  # (item, quantity)
         self.markup_percent = DEFAULT_MARKUP_PERCENT
-    
+
     def add_post(self, post: SecurityPost):
         """Добавление поста."""
-        self.posts.append(post)
-    
-    def add_tmc_item(self, item: Dict[str, Any], quantity: int):
-        """Добавление ТМЦ с количеством."""
+        self.posts[post.post_number] = post
+
+    def get_post(self, post_number: int) -> Optional[SecurityPost]:
+        """Поиск поста по номеру за O(1)."""
+        return self.posts.get(post_number)
+
+    def add_tmc_item(self, item, quantity: int):
+        """Добавление ТМЦ (строка database.Item) с количеством."""
         self.tmc_items.append((item, quantity))
     
     def calculate_total(self) -> Dict[str, Any]:
         """Полный расчет стоимости охраны."""
+        # Пакетный расчет зарплат: один расчет на уникальный оклад,
+        # сколько бы групп и постов его ни использовали
+        unique_salaries = {
+            staff_group['net_salary']
+            for post in self.posts.values()
+            for staff_group in post.staff
+        }
+        breakdowns = {
+            net_salary: full_salary_breakdown(net_salary, has_deduction=True)
+            for net_salary in unique_salaries
+        }
+
         # Расчет по постам
         posts_data = []
         total_labor_cost = 0
         total_monthly_hours = 0
-        
-        for post in self.posts:
-            post_data = post.calculate_cost()
+
+        for post in self.posts.values():
+            post_data = post.calculate_cost(breakdowns)
             posts_data.append(post_data)
             total_labor_cost += post_data['total_labor_cost']
             total_monthly_hours += post_data['monthly_hours']
         
         # Расчет ТМЦ
-        tmc_data = []
-        total_tmc_cost = 0
-        
-        for item, quantity in self.tmc_items:
-            item_monthly_cost = item['monthly_cost'] * quantity
-            total_tmc_cost += item_monthly_cost
-            
-            tmc_data.append({
-                'name': item['name'],
-                'price': item['price'],
+        tmc_data = [
+            {
+                'name': item.name,
+                'price': item.price,
                 'quantity': quantity,
-                'total_cost': item['price'] * quantity,
-                'amortization_months': item['amortization_months'],
-                'monthly_cost': item_monthly_cost
-            })
-        
+                'total_cost': item.price * quantity,
+                'amortization_months': item.amortization_months,
+                'monthly_cost': item.monthly_cost * quantity
+            }
+            for item, quantity in self.tmc_items
+        ]
+        # map + itemgetter суммирует на уровне C, без кадра генератора
+        total_tmc_cost = sum(map(itemgetter('monthly_cost'), tmc_data))
+
         # Итоговая стоимость
         total_cost = total_labor_cost + total_tmc_cost
         markup_amount = total_cost * (self.markup_percent / 100)
@@ -166,51 +203,73 @@ class SecurityCalculator:
         }
 
 
+# Шаблоны отчета: текст и разметка собираются один раз при импорте,
+# на вызов остается подстановка значений через format_map
+_REPORT_HEADER = (
+    "=" * 100 +
+    "\nКОММЕРЧЕСКОЕ ПРЕДЛОЖЕНИЕ - УСЛУГИ ОХРАНЫ\n" +
+    "=" * 100 +
+    "\n\n📍 КОНФИГУРАЦИЯ ПОСТОВ:\n"
+)
+
+_REPORT_POST_TMPL = (
+    "\n   Пост №{post_number} - График {schedule}\n"
+    "   Часов в месяц: {monthly_hours} ч\n"
+    "   Персонал:\n"
+)
+
+_REPORT_STAFF_TMPL = (
+    "      • {position}: {count} чел. × {net_salary:,.0f} ₸ = {total_cost_group:,.0f} ₸/мес"
+)
+
+_REPORT_POST_TOTAL_TMPL = "\n   Стоимость поста: {total_labor_cost:,.0f} ₸/мес"
+
+_REPORT_TMC_HEADER = "\n\n📦 ТОВАРНО-МАТЕРИАЛЬНЫЕ ЦЕННОСТИ:\n"
+
+_REPORT_TMC_TMPL = (
+    "   • {name}: {quantity} шт × {price:,.0f} ₸ = {total_cost:,.0f} ₸\n"
+    "     Амортизация {amortization_months} мес → {monthly_cost:,.0f} ₸/мес"
+)
+
+_REPORT_SUMMARY_TMPL = (
+    "\n\n" + "=" * 100 +
+    "\n💰 ИТОГОВЫЙ РАСЧЕТ:\n" +
+    "=" * 100 +
+    "\n   Фонд оплаты труда (ФОТ):                    {total_labor_cost:>20,.0f} ₸/мес"
+    "\n   ТМЦ (амортизация):                          {total_tmc_cost:>20,.0f} ₸/мес"
+    "\n   " + "-" * 100 +
+    "\n   Себестоимость:                              {subtotal:>20,.0f} ₸/мес"
+    "\n   Маржа ({markup_percent:.1f}%):                                  {markup_amount:>20,.0f} ₸/мес"
+    "\n   " + "=" * 100 +
+    "\n   СТОИМОСТЬ УСЛУГИ:                           {final_price:>20,.0f} ₸/мес"
+    "\n   " + "=" * 100 +
+    "\n\n   📊 Всего постов: {total_posts}"
+    "\n   ⏱️  Всего часов в месяц: {total_monthly_hours} ч"
+    "\n   💵 Тариф за час: {hourly_rate:,.2f} ₸/ч"
+    "\n\n" + "=" * 100
+)
+
+
 def format_calculation_output(result: Dict[str, Any]) -> str:
     """Форматирование вывода расчета."""
-    lines = []
-    lines.append("=" * 100)
-    lines.append("КОММЕРЧЕСКОЕ ПРЕДЛОЖЕНИЕ - УСЛУГИ ОХРАНЫ")
-    lines.append("=" * 100)
-    
-    # Посты
-    lines.append("\n📍 КОНФИГУРАЦИЯ ПОСТОВ:")
-    for post_data in result['posts']:
-        lines.append(f"\n   Пост №{post_data['post_number']} - График {post_data['schedule']}")
-        lines.append(f"   Часов в месяц: {post_data['monthly_hours']} ч")
-        lines.append(f"   Персонал:")
-        
-        for staff in post_data['staff_details']:
-            lines.append(f"      • {staff['position']}: {staff['count']} чел. × {staff['net_salary']:,.0f} ₸ = {staff['total_cost_group']:,.0f} ₸/мес")
-        
-        lines.append(f"   Стоимость поста: {post_data['total_labor_cost']:,.0f} ₸/мес")
-    
-    # ТМЦ
-    if result['tmc']:
-        lines.append(f"\n📦 ТОВАРНО-МАТЕРИАЛЬНЫЕ ЦЕННОСТИ:")
-        for tmc in result['tmc']:
-            lines.append(f"   • {tmc['name']}: {tmc['quantity']} шт × {tmc['price']:,.0f} ₸ = {tmc['total_cost']:,.0f} ₸")
-            lines.append(f"     Амортизация {tmc['amortization_months']} мес → {tmc['monthly_cost']:,.0f} ₸/мес")
-    
-    # Итого
-    summary = result['summary']
-    lines.append(f"\n{'=' * 100}")
-    lines.append("💰 ИТОГОВЫЙ РАСЧЕТ:")
-    lines.append(f"{'=' * 100}")
-    lines.append(f"   Фонд оплаты труда (ФОТ):                    {summary['total_labor_cost']:>20,.0f} ₸/мес")
-    lines.append(f"   ТМЦ (амортизация):                          {summary['total_tmc_cost']:>20,.0f} ₸/мес")
-    lines.append(f"   {'-' * 100}")
-    lines.append(f"   Себестоимость:                              {summary['subtotal']:>20,.0f} ₸/мес")
-    lines.append(f"   Маржа ({summary['markup_percent']:.1f}%):                                  {summary['markup_amount']:>20,.0f} ₸/мес")
-    lines.append(f"   {'=' * 100}")
-    lines.append(f"   СТОИМОСТЬ УСЛУГИ:                           {summary['final_price']:>20,.0f} ₸/мес")
-    lines.append(f"   {'=' * 100}")
-    lines.append(f"\n   📊 Всего постов: {summary['total_posts']}")
-    lines.append(f"   ⏱️  Всего часов в месяц: {summary['total_monthly_hours']} ч")
-    lines.append(f"   💵 Тариф за час: {summary['hourly_rate']:,.2f} ₸/ч")
-    lines.append(f"\n{'=' * 100}")
-    
-    return "\n".join(lines)
+    posts_block = "\n".join(
+        _REPORT_POST_TMPL.format_map(post_data)
+        + "\n".join(map(_REPORT_STAFF_TMPL.format_map, post_data['staff_details']))
+        + _REPORT_POST_TOTAL_TMPL.format_map(post_data)
+        for post_data in result['posts']
+    )
+
+    tmc_block = (
+        _REPORT_TMC_HEADER
+        + "\n".join(map(_REPORT_TMC_TMPL.format_map, result['tmc']))
+    ) if result['tmc'] else ""
+
+    return (
+        _REPORT_HEADER
+        + posts_block
+        + tmc_block
+        + _REPORT_SUMMARY_TMPL.format_map(result['summary'])
+    )
 
 
 def interactive_calculator():
@@ -250,7 +309,7 @@ def interactive_calculator():
                 print(f"\n   Группа {j+1}:")
                 position = input("   Должность: ").strip()
                 count = int(input("   Количество человек: ").strip())
-                net_salary = float(input("   ЗП на руки (₸): ").strip().replace(',', '').replace(' ', ''))
+                net_salary = _parse_money(input("   ЗП на руки (₸): "))
                 
                 post.add_staff(position, count, net_salary)
                 print(f"   ✅ Добавлено: {position} - {count} чел. × {net_salary:,.0f} ₸")
@@ -262,32 +321,38 @@ def interactive_calculator():
         use_tmc = input("\nИспользовать ТМЦ из базы данных? (y/n): ").strip().lower()
         
         if use_tmc in ['y', 'yes', 'да', 'д']:
-            with TMCDatabase() as db:
-                items = db.get_all_items()
-                
-                if not items:
-                    print("❌ База данных ТМЦ пуста")
-                else:
-                    print("\n📦 Доступные ТМЦ:")
-                    print_all_items(items)
-                    
-                    print("\nВыберите ТМЦ (введите ID и количество через запятую, например: 1:2,3:5)")
-                    print("Или нажмите Enter для пропуска")
-                    tmc_input = input("Ваш выбор: ").strip()
-                    
-                    if tmc_input:
-                        selections = tmc_input.split(',')
-                        for selection in selections:
-                            try:
-                                item_id, quantity = map(int, selection.split(':'))
-                                item = db.get_item(item_id)
-                                if item:
-                                    calculator.add_tmc_item(item, quantity)
-                                    print(f"✅ Добавлено: {item['name']} × {quantity} шт")
-                                else:
-                                    print(f"⚠️ Товар ID {item_id} не найден")
-                            except ValueError:
-                                print(f"⚠️ Неверный формат: {selection}")
+            # Модуль базы данных нужен только этой ветке — импортируем
+            # лениво, чтобы не замедлять импорт калькулятора как библиотеки
+            from database import get_shared_db, print_all_items
+
+            # Общее соединение на всю сессию: повторные расчеты
+            # не платят за открытие базы заново
+            db = get_shared_db()
+            items = db.get_all_items()
+
+            if not items:
+                print("❌ База данных ТМЦ пуста")
+            else:
+                print("\n📦 Доступные ТМЦ:")
+                print_all_items(items)
+
+                print("\nВыберите ТМЦ (введите ID и количество через запятую, например: 1:2,3:5)")
+                print("Или нажмите Enter для пропуска")
+                tmc_input = input("Ваш выбор: ").strip()
+
+                if tmc_input:
+                    selections = tmc_input.split(',')
+                    for selection in selections:
+                        try:
+                            item_id, quantity = map(int, selection.split(':'))
+                            item = db.get_item(item_id)
+                            if item:
+                                calculator.add_tmc_item(item, quantity)
+                                print(f"✅ Добавлено: {item.name} × {quantity} шт")
+                            else:
+                                print(f"⚠️ Товар ID {item_id} не найден")
+                        except ValueError:
+                            print(f"⚠️ Неверный формат: {selection}")
         
         # Маржа
         markup_input = input(f"\nМаржа (%, default={DEFAULT_MARKUP_PERCENT}): ").strip()
@@ -309,8 +374,8 @@ def interactive_calculator():
             filepath = f"{filename}.txt"
             
             try:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(output)
+                # Одна запись целиком вместо open/write/close по шагам
+                Path(filepath).write_text(output, encoding='utf-8')
                 print(f"✅ Сохранено: {filepath}")
             except IOError as e:
                 print(f"❌ Ошибка сохранения: {e}")
@@ -2,25 +2,67 @@
 Менеджер товарно-материальных ценностей с интерактивным интерфейсом
 """
 
-from database import TMCDatabase, print_item, print_all_items, print_summary
-from typing import List, Dict, Any
+import sys
+
+from database import Item, TMCDatabase, get_shared_db, print_item, print_all_items, print_summary, _fmt_price
+from salary_calculator import _parse_money
+from typing import List, Optional
+
+# Таблица для str.translate: удаление пробелов и табуляций из ввода ID
+_WS_DELETE = {ord(' '): None, ord('\t'): None}
+
+# Заголовки разделов собираются один раз при импорте:
+# в цикле меню не пересоздаются ни разделитель, ни сами баннеры
+_SEP = "=" * 80
+_ADD_HEADER = f"\n{_SEP}\n➕ ДОБАВЛЕНИЕ НОВОГО ТОВАРА\n{_SEP}\n"
+_UPDATE_HEADER = f"\n{_SEP}\n✏️ ОБНОВЛЕНИЕ ТОВАРА\n{_SEP}\n"
+_DELETE_HEADER = f"\n{_SEP}\n🗑️ УДАЛЕНИЕ ТОВАРА\n{_SEP}\n"
+_SELECT_HEADER = f"\n{_SEP}\n📦 ВЫБОР ТМЦ ДЛЯ РАСЧЕТА\n{_SEP}\n\nДоступные товары:\n"
+_BATCH_HEADER = f"\n{_SEP}\n📥 ПАКЕТНЫЙ ИМПОРТ ТОВАРОВ\n{_SEP}\n"
+_ALL_ITEMS_HEADER = f"\n{_SEP}\n📦 ВСЕ ТОВАРЫ:\n"
+
+
+def _read_line(prompt: str) -> str:
+    """
+    Чтение строки ввода.
+
+    В терминале работает обычный input(); при перенаправленном stdin
+    (скрипты, автотесты) строки читаются из блочного буфера sys.stdin —
+    это значительно быстрее построчного input() на конвейере.
+
+    Args:
+        prompt: Приглашение к вводу
+
+    Returns:
+        Введенная строка без завершающего перевода строки
+
+    Raises:
+        EOFError: При исчерпании ввода (как у input())
+    """
+    if sys.stdin.isatty():
+        return input(prompt)
+
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    line = sys.stdin.readline()
+    if not line:
+        raise EOFError("конец ввода")
+    return line.rstrip('\n')
 
 
 def add_item_interactive(db: TMCDatabase):
     """Интерактивное добавление товара."""
-    print("\n" + "=" * 80)
-    print("➕ ДОБАВЛЕНИЕ НОВОГО ТОВАРА")
-    print("=" * 80)
+    sys.stdout.write(_ADD_HEADER)
     
     try:
-        name = input("Название товара: ").strip()
+        name = _read_line("Название товара: ").strip()
         if not name:
             print("❌ Название не может быть пустым")
             return
         
-        price = float(input("Цена за единицу (₸): ").strip().replace(',', '').replace(' ', ''))
-        quantity = int(input("Количество (шт): ").strip())
-        amortization = int(input("Срок амортизации (месяцев): ").strip())
+        price = _parse_money(_read_line("Цена за единицу (₸): "))
+        quantity = int(_read_line("Количество (шт): ").strip())
+        amortization = int(_read_line("Срок амортизации (месяцев): ").strip())
         
         item_id = db.add_item(name, price, quantity, amortization)
         
@@ -37,13 +79,14 @@ def add_item_interactive(db: TMCDatabase):
 
 def update_item_interactive(db: TMCDatabase):
     """Интерактивное обновление товара."""
-    print("\n" + "=" * 80)
-    print("✏️ ОБНОВЛЕНИЕ ТОВАРА")
-    print("=" * 80)
+    sys.stdout.write(_UPDATE_HEADER)
     
     try:
-        item_id = int(input("ID товара для обновления: ").strip())
-        
+        item_id = int(_read_line("ID товара для обновления: ").strip())
+        if item_id <= 0:
+            print("❌ ID должен быть положительным числом")
+            return
+
         item = db.get_item(item_id)
         if not item:
             print(f"❌ Товар с ID {item_id} не найден")
@@ -54,23 +97,22 @@ def update_item_interactive(db: TMCDatabase):
         
         print("\nВведите новые значения (Enter = оставить без изменений):")
         
-        name_input = input(f"Название [{item['name']}]: ").strip()
+        name_input = _read_line(f"Название [{item.name}]: ").strip()
         name = name_input if name_input else None
-        
-        price_input = input(f"Цена [{item['price']:,.2f} ₸]: ").strip()
-        price = float(price_input.replace(',', '').replace(' ', '')) if price_input else None
-        
-        quantity_input = input(f"Количество [{item['quantity']} шт]: ").strip()
+
+        price_input = _read_line(f"Цена [{_fmt_price(item.price)} ₸]: ").strip()
+        price = _parse_money(price_input) if price_input else None
+
+        quantity_input = _read_line(f"Количество [{item.quantity} шт]: ").strip()
         quantity = int(quantity_input) if quantity_input else None
-        
-        amortization_input = input(f"Срок амортизации [{item['amortization_months']} мес]: ").strip()
+
+        amortization_input = _read_line(f"Срок амортизации [{item.amortization_months} мес]: ").strip()
         amortization = int(amortization_input) if amortization_input else None
         
-        if db.update_item(item_id, name, price, quantity, amortization):
+        updated_item = db.update_item(item_id, name, price, quantity, amortization)
+        if updated_item:
             print("\n✅ Товар обновлен")
-            updated_item = db.get_item(item_id)
-            if updated_item:
-                print_item(updated_item)
+            print_item(updated_item)
         else:
             print("❌ Не удалось обновить товар")
             
@@ -80,13 +122,14 @@ def update_item_interactive(db: TMCDatabase):
 
 def delete_item_interactive(db: TMCDatabase):
     """Интерактивное удаление товара."""
-    print("\n" + "=" * 80)
-    print("🗑️ УДАЛЕНИЕ ТОВАРА")
-    print("=" * 80)
+    sys.stdout.write(_DELETE_HEADER)
     
     try:
-        item_id = int(input("ID товара для удаления: ").strip())
-        
+        item_id = int(_read_line("ID товара для удаления: ").strip())
+        if item_id <= 0:
+            print("❌ ID должен быть положительным числом")
+            return
+
         item = db.get_item(item_id)
         if not item:
             print(f"❌ Товар с ID {item_id} не найден")
@@ -95,7 +138,7 @@ def delete_item_interactive(db: TMCDatabase):
         print("\nВы собираетесь удалить:")
         print_item(item)
         
-        confirm = input("\nПодтвердите удаление (yes/y): ").strip().lower()
+        confirm = _read_line("\nПодтвердите удаление (yes/y): ").strip().lower()
         if confirm in ['yes', 'y', 'да', 'д']:
             if db.delete_item(item_id):
                 print("✅ Товар удален")
@@ -108,43 +151,112 @@ def delete_item_interactive(db: TMCDatabase):
         print(f"❌ Ошибка: {e}")
 
 
-def select_items_for_calculation(db: TMCDatabase) -> List[Dict[str, Any]]:
+def batch_import_interactive(db: TMCDatabase):
+    """
+    Пакетный импорт товаров одной транзакцией.
+
+    Строки читаются из stdin внутри db.batch(): fsync выполняется
+    один раз на всю пачку, а не на каждый добавленный товар. При
+    ошибке в любой строке весь импорт откатывается.
+    """
+    sys.stdout.write(_BATCH_HEADER)
+    print("Формат строки: название;цена;количество;срок амортизации (мес)")
+    print("Пустая строка — завершить импорт")
+
+    count = 0
+    try:
+        with db.batch():
+            while True:
+                try:
+                    line = _read_line("> ").strip()
+                except EOFError:
+                    break
+                if not line:
+                    break
+
+                name, price, quantity, amortization = line.split(';')
+                db.add_item(
+                    name.strip(),
+                    _parse_money(price),
+                    int(quantity),
+                    int(amortization)
+                )
+                count += 1
+    except ValueError as e:
+        print(f"❌ Ошибка: {e} — импорт отменен")
+        return
+
+    print(f"\n✅ Импортировано товаров: {count}")
+
+
+# Кэш последнего выбора ТМЦ: повторный заход в пункт 6 с вводом "."
+# возвращает прежний список без запросов и повторной печати каталога.
+# Сбрасывается при любом изменении данных через меню.
+_last_selection: Optional[List[Item]] = None
+
+
+def _invalidate_selection():
+    """Сброс кэша последнего выбора после изменения данных."""
+    global _last_selection
+    _last_selection = None
+
+
+def select_items_for_calculation(db: TMCDatabase) -> List[Item]:
     """
     Выбор товаров для расчета стоимости охраны.
-    
+
+    Ввод "." повторяет предыдущий выбор без обращения к базе.
+
     Returns:
         Список выбранных товаров
     """
+    global _last_selection
+
+    # Повтор прошлого выбора проверяется до любых обращений к базе
+    # и до печати каталога — дешевая проверка впереди дорогой работы
+    if _last_selection is not None:
+        repeat = _read_line(
+            "\nТочка (.) — повторить предыдущий выбор, Enter — выбрать заново: "
+        ).strip()
+        if repeat == '.':
+            print(f"\n✅ Повтор предыдущего выбора ({len(_last_selection)} шт.)")
+            return _last_selection
+
     items = db.get_all_items()
     
     if not items:
         print("\n❌ База данных пуста. Сначала добавьте товары.")
         return []
     
-    print("\n" + "=" * 80)
-    print("📦 ВЫБОР ТМЦ ДЛЯ РАСЧЕТА")
-    print("=" * 80)
-    print("\nДоступные товары:")
-    print_all_items(items)
+    # Длинный каталог усекается: вывод — главная статья расходов
+    # этой функции, а для выбора ID хватает первых строк
+    sys.stdout.write(_SELECT_HEADER)
+    print_all_items(items, limit=50)
     
     print("\nВведите ID товаров через запятую (например: 1,3,4)")
     print("Или нажмите Enter, чтобы использовать все товары")
-    
-    choice = input("\nВаш выбор: ").strip()
-    
+
+    choice = _read_line("\nВаш выбор: ").strip()
+
     if not choice:
         # Используем все товары
         print(f"\n✅ Выбраны все товары ({len(items)} шт.)")
+        _last_selection = items
         return items
     
     try:
-        # Парсим ID
-        selected_ids = [int(id.strip()) for id in choice.split(',')]
-        
-        # Получаем выбранные товары
+        # Пробелы убираются одним проходом translate по всей строке,
+        # int диспетчеризуется через map на уровне C;
+        # повторы убираем с сохранением порядка
+        cleaned = choice.translate(_WS_DELETE)
+        selected_ids = list(dict.fromkeys(map(int, cleaned.split(','))))
+
+        # Один запрос на все выбранные ID вместо запроса на каждый
+        found = db.get_items_by_ids(selected_ids)
+
         selected_items = []
         for item_id in selected_ids:
-            item = db.get_item(item_id)
+            item = found.get(item_id)
             if item:
                 selected_items.append(item)
             else:
@@ -155,10 +267,12 @@ def select_items_for_calculation(db: TMCDatabase) -> List[Dict[str, Any]]:
             print("\nВыбранные товары:")
             print_all_items(selected_items)
             
-            # Показываем общую месячную стоимость
-            total_monthly = sum(item['monthly_cost'] for item in selected_items)
-            print(f"\n💰 Общая месячная стоимость ТМЦ: {total_monthly:,.2f} ₸")
-        
+            # Общая месячная стоимость суммируется по колонке
+            # monthly_cost, закэшированной в памяти
+            total_monthly = db.sum_monthly_cost(selected_ids)
+            print(f"\n💰 Общая месячная стоимость ТМЦ: {_fmt_price(total_monthly)} ₸")
+
+        _last_selection = selected_items or None
         return selected_items
         
     except ValueError:
@@ -166,53 +280,74 @@ def select_items_for_calculation(db: TMCDatabase) -> List[Dict[str, Any]]:
         return []
 
 
+def _show_all_items(db: TMCDatabase):
+    """Вывод всех товаров базы (пункт меню 1)."""
+    items = db.get_all_items()
+    sys.stdout.write(_ALL_ITEMS_HEADER)
+    print_all_items(items)
+
+
+def _show_summary(db: TMCDatabase):
+    """Вывод сводки по базе (пункт меню 5)."""
+    print_summary(db.get_summary())
+
+
+def _select_for_calculation(db: TMCDatabase):
+    """Выбор товаров для расчета (пункт меню 6)."""
+    selected = select_items_for_calculation(db)
+    if selected:
+        _read_line("\nНажмите Enter для продолжения...")
+
+
+# Диспетчеризация пунктов меню: хэш-поиск вместо цепочки if/elif
+_MENU = {
+    '1': _show_all_items,
+    '2': add_item_interactive,
+    '3': update_item_interactive,
+    '4': delete_item_interactive,
+    '5': _show_summary,
+    '6': _select_for_calculation,
+    '7': batch_import_interactive,
+}
+
+# Пункты меню, меняющие данные: после них кэш последнего выбора устаревает
+_MUTATING_CHOICES = frozenset(('2', '3', '4', '7'))
+
+_MENU_TEXT = (
+    f"\n{_SEP}\n"
+    "УПРАВЛЕНИЕ ТОВАРНО-МАТЕРИАЛЬНЫМИ ЦЕННОСТЯМИ\n"
+    f"{_SEP}\n"
+    "\n1. Показать все товары\n"
+    "2. Добавить товар\n"
+    "3. Обновить товар\n"
+    "4. Удалить товар\n"
+    "5. Показать сводку\n"
+    "6. Выбрать товары для расчета\n"
+    "7. Пакетный импорт\n"
+    "q. Выход\n"
+)
+
+
 def tmc_menu():
     """Главное меню управления ТМЦ."""
-    with TMCDatabase() as db:
-        while True:
-            print("\n" + "=" * 80)
-            print("УПРАВЛЕНИЕ ТОВАРНО-МАТЕРИАЛЬНЫМИ ЦЕННОСТЯМИ")
-            print("=" * 80)
-            print("\n1. Показать все товары")
-            print("2. Добавить товар")
-            print("3. Обновить товар")
-            print("4. Удалить товар")
-            print("5. Показать сводку")
-            print("6. Выбрать товары для расчета")
-            print("q. Выход")
-            
-            choice = input("\nВаш выбор: ").strip().lower()
-            
-            if choice == '1':
-                items = db.get_all_items()
-                print("\n" + "=" * 80)
-                print("📦 ВСЕ ТОВАРЫ:")
-                print_all_items(items)
-                
-            elif choice == '2':
-                add_item_interactive(db)
-                
-            elif choice == '3':
-                update_item_interactive(db)
-                
-            elif choice == '4':
-                delete_item_interactive(db)
-                
-            elif choice == '5':
-                summary = db.get_summary()
-                print_summary(summary)
-                
-            elif choice == '6':
-                selected = select_items_for_calculation(db)
-                if selected:
-                    input("\nНажмите Enter для продолжения...")
-                
-            elif choice == 'q':
-                print("\n👋 До свидания!")
-                break
-                
-            else:
-                print("❌ Неверный выбор. Попробуйте снова.")
+    # Общее соединение на весь процесс: повторные заходы в меню
+    # не платят за открытие базы заново
+    db = get_shared_db()
+    while True:
+        sys.stdout.write(_MENU_TEXT)
+
+        choice = _read_line("\nВаш выбор: ").strip().lower()
+
+        handler = _MENU.get(choice)
+        if handler:
+            handler(db)
+            if choice in _MUTATING_CHOICES:
+                _invalidate_selection()
+        elif choice == 'q':
+            print("\n👋 До свидания!")
+            break
+        else:
+            print("❌ Неверный выбор. Попробуйте снова.")
 
 
 if __name__ == "__main__":